@@ -1,28 +1,18 @@
-import sys
-import atexit
 import os
 import logging
+from importlib.util import find_spec
 
 # Configure environment of tensorflow before importing any other module.
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
-tf_installed = True
-try:
-    import tensorflow as tf
-except ModuleNotFoundError:
-    tf_installed = False
+# Tensorflow is only imported when a neural engine is actually going to be used.
+tf_installed = find_spec("tensorflow") is not None
+if not tf_installed:
     print("-" * 80)
     print("Tensorflow is not installed - Only basic engine is available.")
     print("-" * 80)
 
-if tf_installed and os.environ.get("LOVPY_DISABLE_GPU", 0) == "1":
-    # Disable GPU usage.
-    tf.config.set_visible_devices([], 'GPU')
-if tf_installed:
-    from .models.train_model import load_or_train_model
-
 from .monitor.wrappers import LogipyPrimitive, lovpy_call, clear_previous_raised_exceptions
 import lovpy.exceptions
-from . import exception_handler
 from . import config
 
 
@@ -33,17 +23,33 @@ temp_dir = os.environ.get("LOVPY_TEMP_DIR", None)
 models_dir = os.environ.get("LOVPY_MODELS_DIR", None)
 config.tearup_lovpy(session_name=session_name, temp_dir=temp_dir, models_dir=models_dir)
 
-atexit.register(config.teardown_lovpy)
-if os.environ.get("LOVPY_DEV_MODE", 0) == "1":
-    sys.excepthook = exception_handler.lovpy_dev_exception_handler
-else:
-    sys.excepthook = exception_handler.lovpy_exception_handler
-
 
-# Choose between hybrid and deterministic prover.
+# Choose between hybrid and deterministic prover. Exit cleanup and exception handler are
+# registered upon the first verification of a monitored object.
 theorem_selector = os.environ.get("LOVPY_ENGINE", "HYBRID")
+neural_engine_enabled = (tf_installed and config.is_neural_selector_enabled()
+                         and theorem_selector in ("MLP", "GNN", "HYBRID"))
+
+if neural_engine_enabled and os.environ.get("LOVPY_DISABLE_GPU", 0) == "1":
+    try:
+        import tensorflow as tf
+        # Disable GPU usage, when there is any GPU to disable.
+        if tf.config.list_physical_devices('GPU'):
+            tf.config.set_visible_devices([], 'GPU')
+    except ImportError:
+        neural_engine_enabled = False  # Tensorflow found, but its installation is broken.
 
-if theorem_selector == "BASIC" or not config.is_neural_selector_enabled() or not tf_installed:
+if neural_engine_enabled and os.environ.get("LOVPY_MIXED_PRECISION", 0) == "1":
+    try:
+        import tensorflow as tf
+        # Use reduced precision kernels for neural models, when a GPU is available.
+        if tf.config.get_visible_devices('GPU'):
+            tf.config.experimental.enable_tensor_float_32_execution(True)
+            tf.keras.mixed_precision.set_global_policy("mixed_float16")
+    except ImportError:
+        neural_engine_enabled = False
+
+if not neural_engine_enabled:
     config.set_theorem_selector(config.TheoremSelector.DETERMINISTIC)
 elif theorem_selector == "MLP":
     config.set_theorem_selector(config.TheoremSelector.SIMPLE_NN)
@@ -57,3 +63,11 @@ elif theorem_selector == "HYBRID":
         logger.warning("\tFalling back to deterministic theorem prover.")
 else:
     config.set_theorem_selector(config.TheoremSelector.DETERMINISTIC)
+
+
+def __getattr__(name):
+    # Neural models module depends on tensorflow, so it is only loaded on first access.
+    if name == "load_or_train_model" and tf_installed:
+        from .models.train_model import load_or_train_model
+        return load_or_train_model
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
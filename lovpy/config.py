@@ -1,5 +1,9 @@
+import atexit
 import logging
+import os
+import sys
 import tempfile
+from importlib.util import find_spec
 from enum import Enum
 from pathlib import Path
 from datetime import datetime
@@ -8,6 +12,7 @@ from lovpy.logic.next_theorem_selectors import set_default_theorem_selector, \
     get_default_theorem_selector, BetterNextTheoremSelector
 import lovpy.graphs.timed_property_graph
 import lovpy.logic.prover
+from lovpy import exception_handler
 
 
 VERSION = "0.1.0"
@@ -37,10 +42,19 @@ NEXT_GRAPH_FILENAME = "temp_next.png"
 # Constants for training samples export.
 SIMPLE_MODEL_TRAIN_OUTPUT_DIR = "train_simple"
 GRAPH_MODEL_TRAIN_OUTPUT_DIR = "train_gnn"
+# Name of the directory that keeps data reusable among sessions.
+CACHE_DIR_NAME = "cache"
 
 _models_dir = Path.home() / ".lovpy/models"
 _lovpy_session_name = ""  # A name of the session to be appended to the output directories.
 _lovpy_temp_dir = Path(tempfile.gettempdir()) / "__lovpy_temp__/"
+# Flags that indicate whether scratchdir and models dir are known to exist.
+_scratchdir_created = False
+_models_dir_created = False
+# Flag that indicates whether lovpy's modules are currently initialized.
+_lovpy_initialized = False
+# Flag that indicates whether exit cleanup and exception handler have been registered.
+_runtime_registered = False
 
 
 class TheoremSelector(Enum):
@@ -61,33 +75,70 @@ def get_scratchfile_path(filename):
 
     If scratchdir doesn't exist, it is created first.
     """
+    global _scratchdir_created
+
     current_instance_scratchdir = get_scratchdir_path()
-    if not current_instance_scratchdir.exists():
-        current_instance_scratchdir.mkdir(parents=True)
+    if not _scratchdir_created:
+        current_instance_scratchdir.mkdir(parents=True, exist_ok=True)
+        _scratchdir_created = True
     return current_instance_scratchdir / filename
 
 
+def get_cachefile_path(filename):
+    """Returns absolute path of a file with given filename into lovpy's cache dir.
+
+    Contrary to scratchdir, cache dir is shared among all sessions. If it doesn't exist,
+    it is created first.
+    """
+    cache_dir = _lovpy_temp_dir / CACHE_DIR_NAME
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / filename
+
+
 def remove_scratchfile(filename):
     """Removes given file from lovpy's scratchdir.
 
     If removing the file empties scratchdir, scratchdir is also removed.
     """
-    global _lovpy_session_name
+    remove_scratchfiles([filename])
 
-    if filename.is_absolute():
-        absolute_scratchfile_path = filename
-    else:
-        absolute_scratchfile_path = get_scratchfile_path(filename)
 
-    if absolute_scratchfile_path.is_file():
-        absolute_scratchfile_path.unlink()
+def remove_scratchfiles(filenames):
+    """Removes all given files from lovpy's scratchdir.
+
+    Emptiness of scratchdir is checked only once, after all files have been removed. If
+    scratchdir is empty, it is also removed.
+
+    :param filenames: An iterable of either absolute paths or paths relative to scratchdir.
+    """
+    global _scratchdir_created
+
+    scratchdir = get_scratchdir_path()
+    for filename in filenames:
+        filename = Path(filename)
+        absolute_scratchfile_path = filename if filename.is_absolute() else scratchdir / filename
+        try:
+            absolute_scratchfile_path.unlink()
+        except (FileNotFoundError, IsADirectoryError, PermissionError):
+            pass
+
     # Remove scratchdir if empty.
-    if get_scratchdir_path() and not any(get_scratchdir_path().iterdir()):
-        get_scratchdir_path().rmdir()
-    if not any(_lovpy_temp_dir.iterdir()):
+    if _is_empty_dir(scratchdir):
+        scratchdir.rmdir()
+        _scratchdir_created = False
+    if _is_empty_dir(_lovpy_temp_dir):
         _lovpy_temp_dir.rmdir()
 
 
+def _is_empty_dir(path):
+    """Checks whether given path is an empty directory, using a single directory scan."""
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
 def get_models_dir_path(filename=None):
     """Returns absolute path of the models directory.
 
@@ -97,9 +148,12 @@ def get_models_dir_path(filename=None):
             filename is not provided. If filename is provided, Path points to the absolute path
             of a file with given filename, inside models' directory.
     """
+    global _models_dir_created
+
     absolute_path = Path(_models_dir).absolute()
-    if not absolute_path.exists():
-        absolute_path.mkdir(parents=True)
+    if not _models_dir_created:
+        absolute_path.mkdir(parents=True, exist_ok=True)
+        _models_dir_created = True
     if filename:
         absolute_path = absolute_path / filename
     return absolute_path
@@ -146,6 +200,7 @@ def set_theorem_selector(theorem_selector: TheoremSelector):
             logger.warning("Logipy: No model found under {}".format(
                     str(get_models_dir_path(GRAPH_SELECTION_MODEL_NAME))))
             return False
+
     return True
 
 
@@ -168,10 +223,22 @@ def enable_proving_process_visualization():
 
 
 def tearup_lovpy(session_name="", temp_dir=None, models_dir=None):
-    """Initializes lovpy's modules."""
+    """Initializes lovpy's modules.
+
+    If lovpy is already initialized, previous session is torn down first.
+    """
+    global _lovpy_initialized
     global _lovpy_session_name
     global _lovpy_temp_dir
     global _models_dir
+    global _scratchdir_created
+    global _models_dir_created
+
+    teardown_lovpy()
+
+    # Paths are about to change, so their existence should be checked again.
+    _scratchdir_created = False
+    _models_dir_created = False
 
     # Generate session name.
     _lovpy_session_name = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
@@ -187,20 +254,47 @@ def tearup_lovpy(session_name="", temp_dir=None, models_dir=None):
     if models_dir:
         _models_dir = models_dir
 
-    try:
-        import tensorflow
+    if _is_tensorflow_installed():
         _tearup_models_module()
-    except ModuleNotFoundError:
-        pass
+    _lovpy_initialized = True
 
 
 def teardown_lovpy():
-    """Frees up resources allocated by lovpy's modules."""
-    try:
-        import tensorflow
+    """Frees up resources allocated by lovpy's modules.
+
+    Calling it when lovpy is not initialized has no effect.
+    """
+    global _lovpy_initialized
+
+    if not _lovpy_initialized:
+        return
+    if _is_tensorflow_installed():
         _teardown_models_module()
-    except ModuleNotFoundError:
-        pass
+    _lovpy_initialized = False
+
+
+def ensure_runtime_registered():
+    """Registers lovpy's exit cleanup and exception handler, on first call only.
+
+    It is called upon the first verification of a monitored object, so merely importing
+    lovpy leaves the interpreter's exit and exception handling intact.
+    """
+    global _runtime_registered
+
+    if _runtime_registered:
+        return
+
+    atexit.register(teardown_lovpy)
+    if os.environ.get("LOVPY_DEV_MODE", 0) == "1":
+        sys.excepthook = exception_handler.lovpy_dev_exception_handler
+    else:
+        sys.excepthook = exception_handler.lovpy_exception_handler
+    _runtime_registered = True
+
+
+def _is_tensorflow_installed():
+    """Checks for tensorflow availability without actually importing it."""
+    return find_spec("tensorflow") is not None
 
 
 def _tearup_models_module():
@@ -226,6 +320,4 @@ def _tearup_models_module():
 
 def _teardown_models_module():
     # Cleanup scratch files.
-    remove_scratchfile(get_scratchfile_path(CURRENT_GRAPH_FILENAME))
-    remove_scratchfile(get_scratchfile_path(GOAL_GRAPH_FILENAME))
-    remove_scratchfile(get_scratchfile_path(NEXT_GRAPH_FILENAME))
+    remove_scratchfiles([CURRENT_GRAPH_FILENAME, GOAL_GRAPH_FILENAME, NEXT_GRAPH_FILENAME])
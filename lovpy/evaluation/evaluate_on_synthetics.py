@@ -1,7 +1,14 @@
+import functools
+import hashlib
+import multiprocessing
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from lovpy.config import get_cachefile_path, VERSION
 from lovpy.logic.properties import get_global_properties
-from lovpy.models.dataset_generator import DatasetGenerator
-from lovpy.models.gnn_model import GNNModel
-from lovpy.models.graph_neural_theorem_selector import GraphNeuralNextTheoremSelector
+from lovpy.models.dataset_generator import generate_samples_in_parallel, GENERATION_BATCH_SIZE
 from lovpy.evaluation.evaluation import evaluate_theorem_selector_on_samples
 from lovpy.logic.next_theorem_selectors import BetterNextTheoremSelector
 
@@ -17,71 +24,189 @@ def evaluate():
     print("Evaluating proving systems on synthetic theorems...")
     print("-" * 80)
 
-    properties = get_global_properties()
-    generator = DatasetGenerator(properties, MAX_DEPTH, DATASET_SIZE,
-                                 random_expansion_probability=RANDOM_EXPANSION_PROBABILITY,
-                                 negative_samples_percentage=NEGATIVE_SAMPLES_PERCENTAGE)
+    properties = _compile_properties(get_global_properties())
+    samples = load_or_generate_samples(properties)
+
+    # Deterministic proving system requires no neural model, so it is evaluated in a
+    # separate process, concurrently to the GNN based ones that share the loaded model.
+    # The process is spawned rather than forked, so it shares no tensorflow state with this
+    # one, and imports lovpy with the basic engine in order to not initialize tensorflow.
+    engine = os.environ.get("LOVPY_ENGINE")
+    os.environ["LOVPY_ENGINE"] = "BASIC"
+    with ProcessPoolExecutor(max_workers=1,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        try:
+            deterministic_results = executor.submit(
+                evaluate_deterministic_selector, samples, verbose=False)
+        finally:
+            _restore_environment_variable("LOVPY_ENGINE", engine)
+
+        # Both GNN based proving systems share a single selector.
+        gnn_selector = _create_gnn_selector()
+
+        print("-" * 80)
+        print("Evaluating hybrid proving system...")
+        print("-" * 80)
+        evaluate_hybrid_selector(samples, gnn_selector)
+
+        print("-" * 80)
+        print("Evaluating DGCNN proving system...")
+        print("-" * 80)
+        evaluate_dgcnn_selector(samples, gnn_selector)
+
+        # print("-" * 80)
+        # print("Evaluating Simple NN proving system...")
+        # print("-" * 80)
+        # evaluate_simple_nn_selector(samples)
+
+        print("-" * 80)
+        print("Evaluating deterministic proving system...")
+        print("-" * 80)
+        _print_proving_results(*deterministic_results.result())
 
-    print(f"\tGenerating {DATASET_SIZE} samples...")
-    samples = []
-    for i, s in enumerate(generator):
-        if (i % 10) == 0 or i == DATASET_SIZE - 1:
-            print(f"\t\tGenerated {i}/{DATASET_SIZE}...", end="\r")
-        samples.append(s)
+    # print("-" * 80)
+    # print("Evaluating random selection proving system...")
+    # print("-" * 80)
+    # evaluate_random_selector(samples)
 
-    print("-" * 80)
-    print("Evaluating hybrid proving system...")
-    print("-" * 80)
-    evaluate_hybrid_selector(samples)
 
-    print("-" * 80)
-    print("Evaluating DGCNN proving system...")
-    print("-" * 80)
-    evaluate_dgcnn_selector(samples)
+def load_or_generate_samples(properties):
+    """Loads previously generated samples from cache, or generates and caches new ones.
 
-    # print("-" * 80)
-    # print("Evaluating Simple NN proving system...")
-    # print("-" * 80)
-    # evaluate_simple_nn_selector(samples)
+    Cached samples are reused only when lovpy's version, all generation parameters and the
+    given properties are the same. A cache file that cannot be loaded is regenerated.
+    """
+    cache_path = get_cachefile_path(f"synthetic_samples-{_samples_cache_key(properties)}.pkl")
 
-    print("-" * 80)
-    print("Evaluating deterministic proving system...")
-    print("-" * 80)
-    evaluate_deterministic_selector(samples)
+    if cache_path.exists():
+        print(f"\tLoading {DATASET_SIZE} cached samples from {str(cache_path)}...")
+        try:
+            with cache_path.open("rb") as f:
+                return pickle.load(f)
+        except (EOFError, pickle.UnpicklingError, AttributeError):
+            print("\tCached samples are corrupted, generating them anew...")
 
-    # print("-" * 80)
-    # print("Evaluating random selection proving system...")
-    # print("-" * 80)
-    # evaluate_random_selector(samples)
+    samples = generate_samples(properties)
+    _dump_atomically(samples, cache_path)
+    return samples
+
+
+def generate_samples(properties):
+    """Generates DATASET_SIZE synthetic samples, splitting the work across all CPU cores.
+
+    Batches are seeded by consecutive values starting from zero, so generated samples
+    only depend on given properties and can be cached.
+
+    :param properties: Properties out of which samples are generated.
+
+    :return: A list of DatasetEntity samples.
+    """
+    return generate_samples_in_parallel(
+        properties, DATASET_SIZE, MAX_DEPTH,
+        random_expansion_probability=RANDOM_EXPANSION_PROBABILITY,
+        negative_samples_percentage=NEGATIVE_SAMPLES_PERCENTAGE,
+        seed=0,
+        verbose=True
+    )
 
 
-def evaluate_hybrid_selector(samples):
-    gnn_selector = GraphNeuralNextTheoremSelector(GNNModel.load())
+def evaluate_hybrid_selector(samples, gnn_selector=None, verbose=True):
+    if gnn_selector is None:
+        gnn_selector = _create_gnn_selector()
     det_selector = BetterNextTheoremSelector()
     acc, fallout = evaluate_theorem_selector_on_samples([det_selector, gnn_selector],
-                                                        samples, verbose=True)
-    print("\tproving_acc: {} - proving_fallout: {}".format(round(acc, 4), round(fallout, 4)))
+                                                        samples, verbose=verbose)
+    if verbose:
+        _print_proving_results(acc, fallout)
+    return acc, fallout
 
 
-def evaluate_dgcnn_selector(samples):
-    gnn_selector = GraphNeuralNextTheoremSelector(GNNModel.load())
-    acc, fallout = evaluate_theorem_selector_on_samples(gnn_selector, samples, verbose=True)
-    print("\tproving_acc: {} - proving_fallout: {}".format(round(acc, 4), round(fallout, 4)))
+def evaluate_dgcnn_selector(samples, gnn_selector=None, verbose=True):
+    if gnn_selector is None:
+        gnn_selector = _create_gnn_selector()
+    acc, fallout = evaluate_theorem_selector_on_samples(gnn_selector, samples, verbose=verbose)
+    if verbose:
+        _print_proving_results(acc, fallout)
+    return acc, fallout
 
 
 def evaluate_simple_nn_selector(samples):
     pass  # TODO: Implement
 
 
-def evaluate_deterministic_selector(samples):
+def evaluate_deterministic_selector(samples, verbose=True):
     det_selector = BetterNextTheoremSelector()
-    acc, fallout = evaluate_theorem_selector_on_samples(det_selector, samples, verbose=True)
-    print("\tproving_acc: {} - proving_fallout: {}".format(round(acc, 4), round(fallout, 4)))
+    acc, fallout = evaluate_theorem_selector_on_samples(det_selector, samples, verbose=verbose)
+    if verbose:
+        _print_proving_results(acc, fallout)
+    return acc, fallout
 
 
 def evaluate_random_selector(samples):
     pass  # TODO: Implement
 
 
+def _print_proving_results(acc, fallout):
+    print("\tproving_acc: {} - proving_fallout: {}".format(round(acc, 4), round(fallout, 4)))
+
+
+def _restore_environment_variable(name, value):
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = value
+
+
+def _create_gnn_selector():
+    # GNN model depends on tensorflow, so it is only imported when actually used. This keeps
+    # the process that evaluates the deterministic selector free of tensorflow.
+    from lovpy.models.graph_neural_theorem_selector import GraphNeuralNextTheoremSelector
+    return GraphNeuralNextTheoremSelector(_load_gnn_model())
+
+
+@functools.lru_cache(maxsize=1)
+def _load_gnn_model():
+    """Loads GNN model from disk once and reuses it in every subsequent call."""
+    from lovpy.models.gnn_model import GNNModel
+    return GNNModel.load()
+
+
+def _compile_properties(properties):
+    """Converts given properties into an immutable sequence of deterministic order.
+
+    Global properties are kept in a set, whose iteration order differs among runs. Sorting
+    them once by their textual representation makes seeded sample generation reproducible
+    and lets the sequence be shared as is by all consumers.
+    """
+    return tuple(sorted(properties, key=lambda p: p.get_property_textual_representation()))
+
+
+def _samples_cache_key(properties):
+    """Returns a key that uniquely identifies the samples generated out of given properties.
+
+    :param properties: Properties as returned by _compile_properties().
+    """
+    parameters = (VERSION, DATASET_SIZE, MAX_DEPTH, RANDOM_EXPANSION_PROBABILITY,
+                  NEGATIVE_SAMPLES_PERCENTAGE, GENERATION_BATCH_SIZE,
+                  [p.get_property_textual_representation() for p in properties])
+    return hashlib.sha1(repr(parameters).encode()).hexdigest()
+
+
+def _dump_atomically(obj, path):
+    """Pickles given object to given path, so that a partially written file never exists.
+
+    Object is written to a temporary file in the same directory, which then replaces the
+    target one.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
 if __name__ == "__main__":
     evaluate()
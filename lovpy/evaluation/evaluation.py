@@ -28,6 +28,9 @@ def evaluate_theorem_selector_on_samples(theorem_selector, samples, verbose=Fals
     if not isinstance(theorem_selector, list):
         theorem_selector = [theorem_selector]
 
+    predicted_proved = np.empty(len(samples), dtype=int)
+    actual_proved = np.empty(len(samples), dtype=int)
+
     for i, s in enumerate(samples):
         if verbose:
             print("\t{}/{} validating...".format(i, len(samples)), end="\r")
@@ -38,17 +41,14 @@ def evaluate_theorem_selector_on_samples(theorem_selector, samples, verbose=Fals
                 s.current_graph,
                 s.goal,
                 s.all_theorems,
-                theorem_selector=ts
+                theorem_selector=ts,
+                keep_intermediate_graphs=False
             )
             if proved:
                 break
 
-        if i == 0:
-            predicted_proved = int(proved)
-            actual_proved = int(s.is_provable)
-        else:
-            predicted_proved = np.vstack((predicted_proved, int(proved)))
-            actual_proved = np.vstack((actual_proved, int(s.is_provable)))
+        predicted_proved[i] = int(proved)
+        actual_proved[i] = int(s.is_provable)
 
     acc = accuracy_score(actual_proved, predicted_proved)
     conf_matrix = confusion_matrix(actual_proved, predicted_proved, labels=[0, 1])
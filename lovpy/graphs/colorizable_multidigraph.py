@@ -1,3 +1,5 @@
+from copy import deepcopy
+
 import networkx
 
 
@@ -7,6 +9,215 @@ NODE_OUT_COLORIZATION_LABEL = "node_out_colorized"
 
 
 class ColorizableMultiDiGraph(networkx.MultiDiGraph):
+    # Counter of structural modifications to the graph. Caches of structural data kept by
+    # users of the graph are valid as long as it doesn't change.
+    structure_version = 0
+
+    def is_view(self):
+        """Returns True if graph is a view of another graph."""
+        return getattr(self, "_graph", None) is not None
+
+    def get_structure_cached(self, name, compute):
+        """Returns a value derived from graph's structure, computing it only when stale.
+
+        Cached values are dropped upon any structural modification of the graph. Views are
+        never cached, as they change along with their base graph.
+
+        :param name: A hashable name of the cached value.
+        :param compute: A callable that computes the value, given the graph.
+        """
+        if self.is_view():
+            return compute(self)
+
+        cache = self.__dict__.get("_structure_cache")
+        if cache is None or cache[0] != self.structure_version:
+            cache = (self.structure_version, {})
+            self._structure_cache = cache
+        values = cache[1]
+        if name not in values:
+            values[name] = compute(self)
+        return values[name]
+
+    def copy(self, as_view=False):
+        """Returns an independent copy of the graph.
+
+        Result is the same as networkx's copy(), i.e. graph, node and edge attribute dicts
+        are copied while attribute values are shared. Though, adjacency dicts are built
+        directly, without going through add_nodes_from() and add_edges_from().
+        """
+        if as_view or self.is_view():
+            return super().copy(as_view=as_view)
+
+        g = self.__class__()
+        g.graph.update(self.graph)
+        g._node.update((n, d.copy()) for n, d in self._node.items())
+        succ = g._succ
+        pred = g._pred
+        for n in self._node:
+            succ[n] = self.adjlist_inner_dict_factory()
+            pred[n] = self.adjlist_inner_dict_factory()
+        for u, nbrs in self._succ.items():
+            u_succ = succ[u]
+            for v, keydict in nbrs.items():
+                # Successors and predecessors share the same key dict, as in networkx.
+                new_keydict = self.edge_key_dict_factory()
+                new_keydict.update((k, d.copy()) for k, d in keydict.items())
+                u_succ[v] = new_keydict
+                pred[v][u] = new_keydict
+        return g
+
+    def __deepcopy__(self, memo):
+        """Returns an independent deep copy of the graph.
+
+        Nodes, keys and all attribute dicts are deep copied, as with the default deepcopy.
+        Though, the copy is never frozen, caches of graph's structure are not carried over
+        and views are copied without their base graph.
+        """
+        g = self.__class__()
+        memo[id(self)] = g
+        g.graph.update(deepcopy(self.graph, memo))
+        succ = g._succ
+        pred = g._pred
+        for n, d in self._node.items():
+            n = deepcopy(n, memo)
+            g._node[n] = deepcopy(d, memo)
+            succ[n] = self.adjlist_inner_dict_factory()
+            pred[n] = self.adjlist_inner_dict_factory()
+        for u, nbrs in self._succ.items():
+            u = deepcopy(u, memo)
+            for v, keydict in nbrs.items():
+                v = deepcopy(v, memo)
+                new_keydict = self.edge_key_dict_factory()
+                new_keydict.update((deepcopy(k, memo), deepcopy(d, memo))
+                                   for k, d in keydict.items())
+                succ[u][v] = new_keydict
+                pred[v][u] = new_keydict
+        return g
+
+    def frozen_subgraph_sharing_data(self, nodes):
+        """Returns a frozen subgraph induced by given nodes, that shares data with the graph.
+
+        As with subgraph views, graph, node and edge attribute dicts are the ones of the
+        graph, so changes to them are reflected. Though, adjacency dicts are built once,
+        instead of being filtered upon every access. So, the subgraph is only valid as long
+        as the structure of the graph is not modified.
+        """
+        g = self.__class__()
+        g.graph = self.graph
+        g._node.update((n, d) for n, d in self._node.items() if n in nodes)
+        kept_nodes = g._node
+        succ = g._succ
+        pred = g._pred
+        for n in kept_nodes:
+            succ[n] = self.adjlist_inner_dict_factory()
+            pred[n] = self.adjlist_inner_dict_factory()
+        for u, u_succ in succ.items():
+            for v, keydict in self._succ[u].items():
+                if v in kept_nodes:
+                    new_keydict = self.edge_key_dict_factory()
+                    new_keydict.update(keydict)
+                    u_succ[v] = new_keydict
+        for v, v_pred in pred.items():
+            for u in self._pred[v]:
+                if u in kept_nodes:
+                    v_pred[u] = succ[u][v]
+        return networkx.freeze(g)
+
+    def edge_subgraph_copy(self, edges):
+        """Returns an independent copy of the subgraph induced by given edges.
+
+        Result is the same as edge_subgraph(edges).copy(), though the order of both the
+        successors and the predecessors of the original graph is retained, as if all other
+        edges and the nodes left without any edge were removed from a copy of the graph.
+
+        :param edges: A set of edges in the form of (u, v, key) three-tuples.
+        """
+        g = self.__class__()
+        g.graph.update(self.graph)
+        kept_nodes = {n for e in edges for n in e[:2]}
+        succ = g._succ
+        pred = g._pred
+        for n, d in self._node.items():
+            if n in kept_nodes:
+                g._node[n] = d.copy()
+                succ[n] = self.adjlist_inner_dict_factory()
+                pred[n] = self.adjlist_inner_dict_factory()
+        for u in succ:
+            u_succ = succ[u]
+            for v, keydict in self._succ[u].items():
+                new_keydict = self.edge_key_dict_factory()
+                new_keydict.update((k, d.copy()) for k, d in keydict.items() if (u, v, k) in edges)
+                if new_keydict:
+                    u_succ[v] = new_keydict
+        for v in pred:
+            v_pred = pred[v]
+            for u in self._pred[v]:
+                if u in succ and v in succ[u]:
+                    v_pred[u] = succ[u][v]
+        return g
+
+    def add_edges_from_graph(self, other):
+        """Adds all edges of other graph, along with their nodes.
+
+        Result is the same as add_edges_from(other.edges(keys=True, data=True)), i.e. data
+        of existing edges is updated and new edges get a copy of their data dict, though
+        adjacency dicts of other graph are walked directly.
+        """
+        if networkx.is_frozen(self):
+            raise networkx.NetworkXError("Frozen graph can't be modified")
+        self.structure_version += 1
+        succ = self._succ
+        pred = self._pred
+        for u, nbrs in other._succ.items():
+            for v, other_keydict in nbrs.items():
+                for n in (u, v):
+                    if n not in succ:
+                        succ[n] = self.adjlist_inner_dict_factory()
+                        pred[n] = self.adjlist_inner_dict_factory()
+                        self._node[n] = self.node_attr_dict_factory()
+                keydict = succ[u].get(v)
+                if keydict is None:
+                    keydict = self.edge_key_dict_factory()
+                    succ[u][v] = keydict
+                    pred[v][u] = keydict
+                for k, d in other_keydict.items():
+                    datadict = keydict.get(k)
+                    if datadict is None:
+                        keydict[k] = d.copy()
+                    else:
+                        datadict.update(d)
+
+    def add_node(self, node_for_adding, **attr):
+        self.structure_version += 1
+        super().add_node(node_for_adding, **attr)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        self.structure_version += 1
+        super().add_nodes_from(nodes_for_adding, **attr)
+
+    def add_edge(self, u_for_edge, v_for_edge, key=None, **attr):
+        self.structure_version += 1
+        return super().add_edge(u_for_edge, v_for_edge, key=key, **attr)
+
+    def remove_edge(self, u, v, key=None):
+        self.structure_version += 1
+        super().remove_edge(u, v, key=key)
+
+    def remove_node(self, n):
+        self.structure_version += 1
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes):
+        self.structure_version += 1
+        super().remove_nodes_from(nodes)
+
+    def clear(self):
+        self.structure_version += 1
+        super().clear()
+
+    def clear_edges(self):
+        self.structure_version += 1
+        super().clear_edges()
 
     def build_colorization_scheme(self):
         """Updates the colorization scheme of the graph.
@@ -23,8 +234,16 @@ class ColorizableMultiDiGraph(networkx.MultiDiGraph):
         :param path: A path represented as a sequence of edges in three-tuple form
                 (source, target, key).
         """
-        for e in path:
-            self.edges[e[0], e[1], e[2]][EDGE_COLORIZATION_LABEL] = True
+        self.colorize_edges((e[0], e[1], e[2]) for e in path)
+
+    def colorize_edges(self, edges):
+        """Colorizes given edges.
+
+        :param edges: An iterable of edges in three-tuple form (source, target, key).
+        """
+        adj = self._adj
+        for u, v, k in edges:
+            adj[u][v][k][EDGE_COLORIZATION_LABEL] = True
 
     def out_colorize_nodes(self):
         node_out_colorized = {}
@@ -43,30 +262,28 @@ class ColorizableMultiDiGraph(networkx.MultiDiGraph):
         networkx.set_node_attributes(self, node_out_colorized, NODE_OUT_COLORIZATION_LABEL)
 
     def in_colorize_nodes(self, root=None):
+        node_attrs = networkx.get_node_attributes(self, NODE_IN_COLORIZATION_LABEL)
         if not root:
             root = self.get_root_node()
-            nodes_in_colorization = {self.get_root_node(): True}  # root node is always in-colorized
-            networkx.set_node_attributes(self, nodes_in_colorization, NODE_IN_COLORIZATION_LABEL)
-
-        in_colorized_neighbors = []
+            node_attrs[root] = True  # root node is always in-colorized
 
-        # Using BFS colorize all neighbors whose incoming edges are all colorized.
-        node_attrs = networkx.get_node_attributes(self, NODE_IN_COLORIZATION_LABEL)
-        for n in self.neighbors(root):
-            is_neighbor_in_colorized = True
-            for e in self.in_edges(n, keys=True):
-                if not self.is_edge_colorized(e[0], e[1], e[2]):
-                    is_neighbor_in_colorized = False
-                    break
-            node_attrs[n] = is_neighbor_in_colorized
-            if is_neighbor_in_colorized:
-                in_colorized_neighbors.append(n)
+        # Using BFS colorize all neighbors whose incoming edges are all colorized. Keep
+        # colorizing the subDAG only when a node is marked as in-colorized.
+        expanded = {root}
+        frontier = [root]
+        while frontier:
+            for n in self.neighbors(frontier.pop()):
+                is_neighbor_in_colorized = True
+                for e in self.in_edges(n, keys=True):
+                    if not self.is_edge_colorized(e[0], e[1], e[2]):
+                        is_neighbor_in_colorized = False
+                        break
+                node_attrs[n] = is_neighbor_in_colorized
+                if is_neighbor_in_colorized and n not in expanded:
+                    expanded.add(n)
+                    frontier.append(n)
         networkx.set_node_attributes(self, node_attrs, NODE_IN_COLORIZATION_LABEL)
 
-        # Keep colorizing the subDAG only when a node is marked as in-colorized.
-        for n in in_colorized_neighbors:
-            self.in_colorize_nodes(n)
-
     def is_node_in_colorized(self, node):
         return networkx.get_node_attributes(self, NODE_IN_COLORIZATION_LABEL).get(node, False)
 
@@ -105,9 +322,11 @@ class ColorizableMultiDiGraph(networkx.MultiDiGraph):
                 self._remove_zero_degree_nodes()
 
     def clear_colorization(self):
-        for e in self.edges:
-            if self.edges[e[0], e[1], e[2]].get(EDGE_COLORIZATION_LABEL, False):
-                self.edges[e[0], e[1], e[2]][EDGE_COLORIZATION_LABEL] = False
+        for nbrs in self._adj.values():
+            for keydict in nbrs.values():
+                for data in keydict.values():
+                    if data.get(EDGE_COLORIZATION_LABEL, False):
+                        data[EDGE_COLORIZATION_LABEL] = False
         networkx.set_node_attributes(self, {n: False for n in self.nodes},
                                      NODE_IN_COLORIZATION_LABEL)
         networkx.set_node_attributes(self, {n: False for n in self.nodes},
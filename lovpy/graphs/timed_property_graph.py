@@ -1,20 +1,22 @@
+import heapq
 import itertools
 import logging
+import sys
 from copy import deepcopy
 from io import BytesIO
 from typing import Union, Dict
 
 import networkx
 from networkx.readwrite.graphml import write_graphml
-from networkx.algorithms.simple_paths import all_simple_edge_paths
-from networkx.algorithms.dag import topological_sort, descendants
+from networkx.algorithms.dag import topological_sort
 from networkx.drawing.nx_agraph import to_agraph
 from networkx.exception import NodeNotFound
 from networkx.relabel import relabel_nodes
-from matplotlib import pyplot as plt
-from matplotlib import image as mpimage
 
-from lovpy.graphs.colorizable_multidigraph import ColorizableMultiDiGraph
+from lovpy.graphs.colorizable_multidigraph import (ColorizableMultiDiGraph,
+                                                   EDGE_COLORIZATION_LABEL,
+                                                   NODE_IN_COLORIZATION_LABEL,
+                                                   NODE_OUT_COLORIZATION_LABEL)
 from lovpy.graphs.logical_operators import *
 from lovpy.monitor.time_source import get_global_time_source
 from .timestamps import *
@@ -77,13 +79,16 @@ class TimedPropertyGraph:
         for k, v in self.__dict__.items():
             setattr(copy_obj, k, deepcopy(v, memo))
 
-        copy_obj.graph = copy_obj.graph.copy()  # Unfreeze copied graph.
+        # Deep copies of graphs are never frozen.
 
         return copy_obj
 
     def add_constant_property(self, constant_property: 'ConstantProperty'):
         if not isinstance(constant_property, ConstantProperty):
             raise RuntimeError("Given property is not instance of ConstantProperty.")
+        # Constant properties are idempotent, so applying the same one twice is a waste.
+        if any(type(p) is type(constant_property) for p in self.constant_properties):
+            return
         self.constant_properties.append(constant_property)
 
     def logical_and(self, property_graph: 'TimedPropertyGraph') -> 'TimedPropertyGraph':
@@ -100,7 +105,7 @@ class TimedPropertyGraph:
         if isinstance(timestamp2, RelativeTimestamp):
             timestamp2.set_time_source(self.time_source)
 
-        self.graph.add_edges_from(property_graph.graph.edges(keys=True, data=True))
+        self.graph.add_edges_from_graph(property_graph.graph)
         if not was_empty:
             # TODO: Implement recursive naming.
             and_node = AndOperator(self.get_root_node(), property_graph.get_root_node())
@@ -135,7 +140,7 @@ class TimedPropertyGraph:
         assumption_timestamp = self.get_most_recent_timestamp()
         conclusion_timestamp = property_graph.get_most_recent_timestamp()
 
-        self.graph.add_edges_from(property_graph.graph.edges(data=True, keys=True))
+        self.graph.add_edges_from_graph(property_graph.graph)
         self._add_edge(impl_node, self.get_root_node(),
                        {TIMESTAMP_PROPERTY_NAME: assumption_timestamp,
                        IMPLICATION_PROPERTY_NAME: ASSUMPTION_GRAPH})
@@ -151,8 +156,8 @@ class TimedPropertyGraph:
         :param n: Node of current graph where inserted graph will be placed.
         """
         # Add graph as an unconnected component.
-        for edge in graph.get_graph().edges(data=TIMESTAMP_PROPERTY_NAME):
-            self._add_edge(edge[0], edge[1], {TIMESTAMP_PROPERTY_NAME: edge[2]},
+        for u, v, _, data in graph._get_edges_cached():
+            self._add_edge(u, v, {TIMESTAMP_PROPERTY_NAME: data.get(TIMESTAMP_PROPERTY_NAME)},
                            update_if_exists=True)
 
         # Intervene an AND node to connect the inserted unconnected component.
@@ -160,11 +165,7 @@ class TimedPropertyGraph:
             and_node = AndOperator(n, graph.get_root_node())
 
             # Move all incoming edges from target node to the new AND node.
-            predecessor_edges = list(self.graph.in_edges(n, keys=True))
-            for p_edge in predecessor_edges:
-                t = self.graph.edges[p_edge[0], p_edge[1], p_edge[2]][TIMESTAMP_PROPERTY_NAME]
-                self.graph.remove_edge(p_edge[0], p_edge[1], key=p_edge[2])
-                self._add_edge(p_edge[0], and_node, {TIMESTAMP_PROPERTY_NAME: t})
+            self._move_incoming_edges(n, and_node)
 
             # Connect the new AND node with target node and root of unconnected component.
             old_part_timestamp = self._find_subgraph_most_recent_timestamp(n)
@@ -222,11 +223,7 @@ class TimedPropertyGraph:
         if deeper_common_node:
             and_node = AndOperator(deeper_common_node, conclusion.get_root_node())
             # Move all incoming edges from deeper common node to the new AND node.
-            predecessor_edges = list(self.graph.in_edges(deeper_common_node, keys=True))
-            for p_edge in predecessor_edges:
-                t = self.graph.edges[p_edge[0], p_edge[1], p_edge[2]][TIMESTAMP_PROPERTY_NAME]
-                self.graph.remove_edge(p_edge[0], p_edge[1], key=p_edge[2])
-                self._add_edge(p_edge[0], and_node, {TIMESTAMP_PROPERTY_NAME: t})
+            self._move_incoming_edges(deeper_common_node, and_node)
             # Connect the new AND node with deeper common node and
             # the unconnected conclusion component.
             old_part_timestamp = self._find_subgraph_most_recent_timestamp(deeper_common_node)
@@ -292,8 +289,8 @@ class TimedPropertyGraph:
         if isinstance(timestamp, RelativeTimestamp):
             timestamp.set_time_source(self.time_source)
 
-        for u, v, k in self.graph.edges(keys=True):
-            self.graph.edges[u, v, k][TIMESTAMP_PROPERTY_NAME] = timestamp
+        for _, _, _, data in self._get_edges_cached():
+            data[TIMESTAMP_PROPERTY_NAME] = timestamp
 
         return self
 
@@ -306,19 +303,23 @@ class TimedPropertyGraph:
 
         :returns: True if graph is uniform timestamped, otherwise False.
         """
-        edges = list(self.graph.edges(keys=True, data=TIMESTAMP_PROPERTY_NAME))
+        edges = self._get_edges_cached()
         if not timestamp:
-            timestamp = edges[0][3]
-        for edge in edges:
-            if timestamp.is_absolute() != edge[3].is_absolute():
-                # All timestamps should either be absolute or relative.
+            timestamp = edges[0][3].get(TIMESTAMP_PROPERTY_NAME)
+        is_absolute = timestamp.is_absolute()
+        value = timestamp.get_absolute_value() if is_absolute else None
+
+        # Timestamps are checked in a single pass, stopping on the first one that differs.
+        for _, _, _, data in edges:
+            t = data.get(TIMESTAMP_PROPERTY_NAME)
+            # All timestamps should either be absolute or relative.
+            if t.is_absolute() != is_absolute:
                 return False
-
-            if timestamp.is_absolute() and (
-                    timestamp.get_absolute_value() != edge[3].get_absolute_value()):
+            if is_absolute:
                 # Absolute timestamps should have exact the same value.
-                return False
-            elif not timestamp.is_absolute() and timestamp != edge[3]:
+                if t.get_absolute_value() != value:
+                    return False
+            elif timestamp != t:
                 # Relative timestamps should have a common interval.
                 return False
         return True
@@ -328,31 +329,55 @@ class TimedPropertyGraph:
 
     def set_time_source(self, time_source):
         self.time_source = time_source
-        for edge in self.graph.edges(keys=True, data=TIMESTAMP_PROPERTY_NAME):
-            if isinstance(edge[3], RelativeTimestamp):
-                edge[3].set_time_source(time_source)
+        for _, _, _, data in self._get_edges_cached():
+            timestamp = data.get(TIMESTAMP_PROPERTY_NAME)
+            if isinstance(timestamp, RelativeTimestamp):
+                timestamp.set_time_source(time_source)
 
     def get_most_recent_timestamp(self):
-        timestamps = [e[3] for e in self.get_graph().edges(keys=True, data=TIMESTAMP_PROPERTY_NAME)]
-        return max(timestamps) if timestamps else None
+        timestamps = [data.get(TIMESTAMP_PROPERTY_NAME)
+                      for _, _, _, data in self._get_edges_cached()]
+        if len(timestamps) <= 1:
+            return timestamps[0] if timestamps else None
+        # Timestamps are ordered by the upper limit of their validity interval, so compute
+        # it once per timestamp instead of twice per comparison.
+        return max(timestamps, key=lambda t: t.get_validity_interval()[1])
 
     def get_top_level_implication_subgraphs(self):
         assumption = None
         conclusion = None
+        assumption_root = None
+        conclusion_root = None
 
         if isinstance(self.root_node, ImplicationOperator):
-            root_edges = list(self.graph.edges(self.root_node, keys=True,
-                                               data=IMPLICATION_PROPERTY_NAME))
-            for edge in root_edges:
-                if edge[3] == ASSUMPTION_GRAPH:
-                    assumption = self.graph.subgraph(networkx.dfs_postorder_nodes(
-                        self.graph, edge[1]))
-                elif edge[3] == CONCLUSION_GRAPH:
-                    conclusion = self.graph.subgraph(networkx.dfs_postorder_nodes(
-                        self.graph, edge[1]))
-
-        return self._inflate_property_graph_from_subgraph(assumption), \
-            self._inflate_property_graph_from_subgraph(conclusion)
+            (assumption_root, assumption_nodes), (conclusion_root, conclusion_nodes) = \
+                self._get_cached(("implication_parts", self.root_node),
+                                 self._find_implication_parts)
+            if networkx.is_frozen(self.graph) and not self.graph.is_view():
+                # Parts of frozen graphs never change, so they are extracted only once into
+                # standalone frozen graphs, whose caches are then shared by all callers.
+                assumption, conclusion = self._get_cached(
+                    ("frozen_implication_parts", self.root_node),
+                    lambda graph: (_frozen_subgraph(graph, assumption_nodes),
+                                   _frozen_subgraph(graph, conclusion_nodes))
+                )
+            elif isinstance(self.graph, ColorizableMultiDiGraph) and not self.graph.is_view():
+                # Parts share data with the graph, as views do, but their structure is only
+                # built once per structural change of the graph, so their own caches are
+                # reused too.
+                assumption, conclusion = self._get_cached(
+                    ("implication_parts_graphs", self.root_node),
+                    lambda graph: (_frozen_subgraph_sharing_data(graph, assumption_nodes),
+                                   _frozen_subgraph_sharing_data(graph, conclusion_nodes))
+                )
+            else:
+                if assumption_nodes is not None:
+                    assumption = self.graph.subgraph(assumption_nodes)
+                if conclusion_nodes is not None:
+                    conclusion = self.graph.subgraph(conclusion_nodes)
+
+        return self._inflate_property_graph_from_subgraph(assumption, assumption_root), \
+            self._inflate_property_graph_from_subgraph(conclusion, conclusion_root)
 
     def remove_subgraph(self, subgraph):
         # TODO: Implement using find_equivalent_subgraphs()
@@ -392,9 +417,13 @@ class TimedPropertyGraph:
         return self.graph
 
     def get_copy(self):
+        return self._copy_with_graph(self.graph.copy())
+
+    def _copy_with_graph(self, graph):
+        """Returns a copy of property graph, that is backed by the given networkx graph."""
         # TODO: Fix copying for subclasses with arguments in __init__.
         copy_obj = type(self)()
-        copy_obj.graph = self.graph.copy()
+        copy_obj.graph = graph
         copy_obj.root_node = self.root_node  # Node references remain the same.
         copy_obj.time_source = self.time_source
         copy_obj.property_textual_representation = self.property_textual_representation
@@ -414,12 +443,15 @@ class TimedPropertyGraph:
 
     def get_leaves(self):
         """Returns the leaves of temporal graph."""
-        return [n for n, d in self.graph.out_degree() if d == 0]
+        # Leaves are the nodes without any successor, so out degrees need not be counted.
+        return list(self._get_cached(
+            "leaves", lambda graph: [n for n, successors in graph._succ.items() if not successors]))
 
     def get_present_time_subgraph(self):
+        present = Timestamp(self.time_source.get_current_time())
         present_time_edges = [
-            (e[0], e[1], e[2]) for e in self.graph.edges(data=TIMESTAMP_PROPERTY_NAME, keys=True)
-            if e[3].matches(Timestamp(self.time_source.get_current_time()))
+            (u, v, k) for u, v, k, data in self._get_edges_cached()
+            if data.get(TIMESTAMP_PROPERTY_NAME).matches(present)
         ]
         subgraph = self.graph.edge_subgraph(present_time_edges).copy()
         # TODO: Fix subgraph by removing AND nodes with single out edge and adjacent NOT nodes.
@@ -434,42 +466,44 @@ class TimedPropertyGraph:
 
     def to_agraph(self, title="", show_colorization=False):
         """Converts TimedPropertyGraph to pygraphviz's AGraph suitable for visualization."""
-        prop_graph = deepcopy(self)
-        prop_graph.graph.graph['label'] = title
-        prop_graph.graph.graph['labelloc'] = 't'
-        prop_graph.graph.graph['fontname'] = 'Segoe UI'
-
-        for e in prop_graph.graph.edges:
-            # Set label text of each edge.
-            prop_graph.graph.edges[e[0], e[1], e[2]]['label'] = \
-                str(prop_graph.graph.edges[e[0], e[1], e[2]][TIMESTAMP_PROPERTY_NAME])
-            # Set color of each edge.
-            prop_graph.graph.edges[e[0], e[1], e[2]]['color'] = \
-                'red' if prop_graph.graph.is_edge_colorized(e[0], e[1], e[2]) else 'black'
-            prop_graph.graph.edges[e[0], e[1], e[2]]['fontcolor'] = 'red'
-            prop_graph.graph.edges[e[0], e[1], e[2]]['fontname'] = 'Segoe UI'
-        for n in prop_graph.graph.nodes:
+        # Only attribute dicts are modified, so a copy of the underlying graph suffices.
+        graph = self.graph.copy()
+        graph.graph['label'] = title
+        graph.graph['labelloc'] = 't'
+        graph.graph['fontname'] = 'Segoe UI'
+
+        for _, _, data in graph.edges(data=True):
+            # Set label text and color of each edge.
+            data['label'] = str(data[TIMESTAMP_PROPERTY_NAME])
+            data['color'] = 'red' if data.get(EDGE_COLORIZATION_LABEL, False) else 'black'
+            data['fontcolor'] = 'red'
+            data['fontname'] = 'Segoe UI'
+        for n, data in graph.nodes(data=True):
             # Set label of each node.
-            prop_graph.graph.nodes[n]['label'] = \
-                n.get_operator_symbol() if isinstance(n, LogicalOperator) else str(n)
+            data['label'] = n.get_operator_symbol() if isinstance(n, LogicalOperator) else str(n)
             # Set color of each node.
             node_color = 'teal'
             if show_colorization:
-                if (prop_graph.graph.is_node_in_colorized(n)
-                        and prop_graph.graph.is_node_out_colorized(n)):
+                in_colorized = data.get(NODE_IN_COLORIZATION_LABEL, False)
+                out_colorized = data.get(NODE_OUT_COLORIZATION_LABEL, False)
+                if in_colorized and out_colorized:
                     node_color = 'red'
-                elif prop_graph.graph.is_node_in_colorized(n):
+                elif in_colorized:
                     node_color = 'orange'
-                elif prop_graph.graph.is_node_out_colorized(n):
+                elif out_colorized:
                     node_color = 'purple'
-            prop_graph.graph.nodes[n]['color'] = node_color
-            prop_graph.graph.nodes[n]['fillcolor'] = node_color
-            prop_graph.graph.nodes[n]['style'] = 'filled'
-            prop_graph.graph.nodes[n]['fontname'] = 'Segoe UI'
+            data['color'] = node_color
+            data['fillcolor'] = node_color
+            data['style'] = 'filled'
+            data['fontname'] = 'Segoe UI'
 
-        return to_agraph(prop_graph.graph)
+        return to_agraph(graph)
 
     def visualize(self, title="", show_colorization=False, export_path=None):
+        # Matplotlib is only imported when a graph is actually visualized.
+        from matplotlib import pyplot as plt
+        from matplotlib import image as mpimage
+
         plt.figure(num=None, figsize=(4, 4), dpi=300, facecolor='w', edgecolor='w')
         plt.axis('off')
         plt.tight_layout()
@@ -545,28 +579,34 @@ class TimedPropertyGraph:
 
         original_timestamps = [find_path_timestamp(p) for p in matched_paths]
         groups_timestamps = [[find_path_timestamp(p) for p in group] for group in matching_groups]
-        cases = list(itertools.product(*matching_groups))  # all subgraphs that match other graph
-        cases_timestamps = list(itertools.product(*groups_timestamps))
-        sorted_by_original_timestamps = list(zip(*sorted(zip(
-            original_timestamps, matched_paths, *cases_timestamps, *cases), key=lambda row: row[0]
-        )))
-        original_timestamps = sorted_by_original_timestamps[0]
-        matched_paths = sorted_by_original_timestamps[1]
-        cases_timestamps = sorted_by_original_timestamps[2:len(cases)+2]
-        cases = sorted_by_original_timestamps[len(cases)+2:]
-
-        cases_to_remove = set()
 
-        for i in range(len(cases)):
-            case = cases[i]
-            case_timestamps = cases_timestamps[i]
-
-            if not timestamp_sequences_matches(original_timestamps, case_timestamps):
-                cases_to_remove.add(i)
-
-        matching_cases = [cases[i] for i in range(len(cases)) if i not in cases_to_remove]
-        matching_cases_timestamps = [cases_timestamps[i] for i in range(len(cases))
-                                     if i not in cases_to_remove]
+        # Matched paths are sorted by their timestamps, along with the paths of every case.
+        order = sorted(range(len(matched_paths)), key=lambda i: original_timestamps[i])
+        original_timestamps = tuple(original_timestamps[i] for i in order)
+        matched_paths = tuple(matched_paths[i] for i in order)
+
+        # Timestamps are prepared for comparison once, instead of once for every case.
+        zero_based_original = [to_zero_based_timestamp(t) for t in original_timestamps]
+        zero_based_groups = [[to_zero_based_timestamp(t) for t in group]
+                             for group in groups_timestamps]
+
+        # Pairs of timestamps that are both absolute or both relative match regardless of
+        # the rest of a case, so paths that fail such a pair are dropped before combining.
+        candidates = [None] * len(matching_groups)
+        for t1, i in zip(zero_based_original, order):
+            candidates[i] = [j for j, t2 in enumerate(zero_based_groups[i])
+                             if t1.is_absolute() != t2.is_absolute() or t1.matches(t2)]
+
+        # Lazily iterate over all subgraphs that match other graph, retaining only the ones
+        # whose timestamps also match.
+        matching_cases = []
+        matching_cases_timestamps = []
+        for indices in itertools.product(*candidates):
+            zero_based_case = [zero_based_groups[i][indices[i]] for i in order]
+            if zero_based_timestamp_sequences_matches(zero_based_original, zero_based_case):
+                case_timestamps = tuple(groups_timestamps[i][indices[i]] for i in order)
+                matching_cases.append(tuple(matching_groups[i][indices[i]] for i in order))
+                matching_cases_timestamps.append(case_timestamps)
 
         return matching_cases, matched_paths, original_timestamps, matching_cases_timestamps
 
@@ -604,14 +644,20 @@ class TimedPropertyGraph:
         """
         basic_predicates = []
         predicate_nodes = [n for n in self.graph.nodes if isinstance(n, PredicateNode)]
+        leaf_nodes = self.get_leaves()
 
         for n in predicate_nodes:
-            paths_to_predicate = all_simple_edge_paths(self.graph, self.get_root_node(), n)
+            paths_to_predicate = _simple_edge_paths(self.graph, self.get_root_node(), n)
+            suffix_edges = None  # Edges below predicate are shared by all paths to it.
 
             # Each path to a predicate defines a basic predicate graph.
             for p in paths_to_predicate:
-                predicate_graph = self.get_copy()
-                predicate_graph._retain_only_edges_that_starts_with(p)
+                if suffix_edges is None:
+                    suffix_edges = {e[:3] for suffix in _simple_edge_paths(
+                        self.graph, n, leaf_nodes) for e in suffix}
+                # Only copy the edges of the path and the ones below predicate.
+                predicate_graph = self._copy_with_graph(self.graph.edge_subgraph_copy(
+                    suffix_edges.union(e[:3] for e in p)))
                 predicate_graph._fix_orphan_logical_operators()
                 predicate_graph._clean_orphan_timestamps()
                 predicate_graph._apply_all_constant_properties()
@@ -625,8 +671,8 @@ class TimedPropertyGraph:
         :return: A list of paths in the form of TimestampedPath objects.
         """
         leaf_nodes = self.get_leaves()
-        paths = all_simple_edge_paths(self.graph, self.get_root_node(), leaf_nodes)
-        return [TimestampedPath(p, self.find_path_timestamp(p)) for p in paths]
+        paths = _simple_edge_paths(self.graph, self.get_root_node(), leaf_nodes)
+        return [TimestampedPath(p, find_path_timestamp(p)) for p in paths]
 
     def update_subgraph_timestamp(self, subgraph, new_timestamp):
         """Sets timestamps of given subgraph to the given timestamp.
@@ -643,7 +689,6 @@ class TimedPropertyGraph:
             logger = logging.getLogger(LOGGER_NAME)
             logger.warning("More than a single case found while updating subgraph timestamp.")
         elif not matching_cases:
-            matching_cases, _, _, _ = self.find_equivalent_subgraphs(subgraph)
             raise RuntimeError("Failed to update timestamps of given subgraph: subgraph not found.")
 
         case_to_update = matching_cases[0]
@@ -666,12 +711,14 @@ class TimedPropertyGraph:
         The timestamp of a path is considered to be the oldest timestamp of its edges.
 
         :param path: A path represented as an iterable of the edges belonging to the path.
-                Each edge is represented as a two-tuple, containing the source node as first
-                item and the target node as second item.
+                Each edge is represented as a three-tuple (source, target, key), or as a
+                four-tuple (source, target, key, timestamp) whose timestamp is used as is.
 
         :return: The timestamp of the path in the form of a Timestamp object.
         """
-        return min([self.graph.edges[e[0], e[1], e[2]].get(TIMESTAMP_PROPERTY_NAME) for e in path])
+        adj = self.graph._adj
+        return min(e[3] if len(e) > 3 else adj[e[0]][e[1]][e[2]].get(TIMESTAMP_PROPERTY_NAME)
+                   for e in path)
 
     def get_node_label(self, n):
         """Returns a printable text for each node.
@@ -742,29 +789,76 @@ class TimedPropertyGraph:
     def _get_top_level_implication_edges(self):
         assumption_edge = None
         conclusion_edge = None
-        root_edges = list(self.graph.edges(self.get_root_node(), data=True, keys=True))
+        root = self.get_root_node()
 
-        for e in root_edges:
-            edge_data = e[3]
-            if edge_data.get(IMPLICATION_PROPERTY_NAME, None) == ASSUMPTION_GRAPH:
-                assumption_edge = e
-            elif edge_data.get(IMPLICATION_PROPERTY_NAME, None) == CONCLUSION_GRAPH:
-                conclusion_edge = e
+        for v, keydict in self.graph.succ[root].items():
+            for k, edge_data in keydict.items():
+                if edge_data.get(IMPLICATION_PROPERTY_NAME, None) == ASSUMPTION_GRAPH:
+                    assumption_edge = (root, v, k, edge_data)
+                elif edge_data.get(IMPLICATION_PROPERTY_NAME, None) == CONCLUSION_GRAPH:
+                    conclusion_edge = (root, v, k, edge_data)
 
         return assumption_edge, conclusion_edge
 
+    def _get_edges_cached(self):
+        """Returns all edges of the graph in (u, v, key, data) form.
+
+        Edges are enumerated once per structural modification of the graph. Data dicts are
+        the ones stored in the graph, so changes to edge data are always reflected.
+        """
+        return self._get_cached("edges", _list_edges)
+
+    def _get_cached(self, name, compute):
+        """Returns a value derived from graph's structure, computing it only when stale.
+
+        :param name: A hashable name of the cached value.
+        :param compute: A callable that computes the value, given the graph.
+        """
+        if not isinstance(self.graph, ColorizableMultiDiGraph):
+            return compute(self.graph)
+        return self.graph.get_structure_cached(name, compute)
+
+    def _find_implication_parts(self, graph):
+        """Returns the roots and the nodes of assumption and conclusion parts of an implication.
+
+        Each part is returned as a (root, nodes) tuple, that is (None, None) for a missing part.
+        """
+        assumption = (None, None)
+        conclusion = (None, None)
+        for v, keydict in graph.succ[self.root_node].items():
+            for data in keydict.values():
+                if data.get(IMPLICATION_PROPERTY_NAME) == ASSUMPTION_GRAPH:
+                    assumption = (v, _nodes_reachable_from(graph, v))
+                elif data.get(IMPLICATION_PROPERTY_NAME) == CONCLUSION_GRAPH:
+                    conclusion = (v, _nodes_reachable_from(graph, v))
+        return assumption, conclusion
+
+    def _move_incoming_edges(self, old_target, new_target):
+        """Moves all incoming edges of a node to another one, retaining their timestamps.
+
+        New target is expected to be a newly added node, that is not the root of the graph.
+        """
+        # Predecessors are read directly from graph's predecessors index.
+        predecessor_edges = [(u, old_target, k, data[TIMESTAMP_PROPERTY_NAME])
+                             for u, keydict in self.graph.pred[old_target].items()
+                             for k, data in keydict.items()]
+        self.graph.remove_edges_from(predecessor_edges)
+        self.graph.add_edges_from([(u, new_target, {TIMESTAMP_PROPERTY_NAME: t})
+                                   for u, _, _, t in predecessor_edges])
+
     def _add_node(self, node):
         self.graph.add_node(node)
         if self.root_node is None:
             self.root_node = node
 
     def _add_edge(self, start_node, end_node, data_dict=dict(), update_if_exists=False):
-        data_dict = {k: v for k, v in data_dict.items() if v}  # Remove None arguments.
-        if update_if_exists and self.graph.has_edge(start_node, end_node):
-            key = list(self.graph[start_node][end_node].keys())[0]  # Now, only uses the first key.
-            new_data = _merge_timestamped_data(self.graph[start_node][end_node][key],
-                                               data_dict, keep_newer=True)
-            self.graph[start_node][end_node][key].update(new_data)
+        if not all(data_dict.values()):
+            data_dict = {k: v for k, v in data_dict.items() if v}  # Remove None arguments.
+        existing = self.graph._adj[start_node].get(end_node) \
+            if update_if_exists and start_node in self.graph._adj else None
+        if existing:
+            edge_data = existing[next(iter(existing))]  # Now, only uses the first key.
+            edge_data.update(_merge_timestamped_data(edge_data, data_dict, keep_newer=True))
         else:
             self.graph.add_edge(start_node, end_node, **data_dict)
         if self.get_root_node() is None or end_node == self.get_root_node():
@@ -774,16 +868,19 @@ class TimedPropertyGraph:
         for constant_property in self.constant_properties:
             constant_property.apply()
 
-    def _inflate_property_graph_from_subgraph(self, subgraph):
+    def _inflate_property_graph_from_subgraph(self, subgraph, root_hint=None):
         if len(subgraph) == 0:
             return None
         property_graph = TimedPropertyGraph()
         property_graph.graph = subgraph
         property_graph.time_source = self.time_source
         property_graph.property_textual_representation = self.property_textual_representation
-        for node_in_degree in subgraph.in_degree():
-            if node_in_degree[1] == 0:
-                property_graph.root_node = node_in_degree[0]
+        if root_hint is not None and root_hint in subgraph and subgraph.in_degree(root_hint) == 0:
+            property_graph.root_node = root_hint  # Known root, so nodes need not be scanned.
+        else:
+            for node_in_degree in subgraph.in_degree():
+                if node_in_degree[1] == 0:
+                    property_graph.root_node = node_in_degree[0]
         if not property_graph.root_node:
             raise Exception("Provided subgraph doesn't contain any root node.")
         return property_graph
@@ -814,33 +911,71 @@ class TimedPropertyGraph:
             if not self.get_graph().has_node(leaf):
                 return [], [], False
 
-        # Obtain all simple paths from root to leaves in other graph.
-        other_paths = all_simple_edge_paths(other.get_graph(), other.get_root_node(), other_leaves)
-        # Networkx doesn't include edge data, so manually add timestamps.
-        other_paths = _fill_paths_with_timestamps(other.get_graph(), other_paths)
-
-        # Obtain all simple paths from root to leaves of other graph in current graph.
-        current_paths = all_simple_edge_paths(self.get_graph(), self.get_root_node(), other_leaves)
-        current_paths = list(_fill_paths_with_timestamps(self.get_graph(), current_paths))
+        # Obtain all simple paths from root to leaves in other graph. Paths structure is
+        # reused until other graph changes, along with the data dicts of their edges, from
+        # which timestamps are read anew only when all paths are matched.
+        other_root = other.get_root_node()
+        other_paths_structure = other._get_cached(
+            ("paths_to_leaves", other_root),
+            lambda graph: _with_edge_data_dicts(
+                graph, _simple_edge_paths(graph, other_root, other_leaves))
+        )
+        # Logical signatures of paths don't depend on timestamps, so they are cached too.
+        other_signatures = other._get_cached(
+            ("paths_signatures", other_root),
+            lambda graph: [_path_signature(p) for p in other_paths_structure]
+        )
+
+        # Non skipable nodes of a matching path should all be found in other graph, so paths
+        # passing from any other non skipable node can never match.
+        other_nodes = other._get_cached(
+            "non_skipable_nodes",
+            lambda graph: frozenset(n for n in graph if not _is_skipable_node(n))
+        )
+
+        # Obtain all simple paths from root to leaves of other graph in current graph, indexed
+        # by their leaf and polarity, so every path of other graph is only compared against
+        # the ones that may logically match it. Search is restricted to the nodes that can
+        # reach these leaves through possibly matching nodes, found by walking backwards.
+        # Index is reused for the same leaves and nodes until current graph changes, with
+        # timestamps read anew only for matching paths.
+        current_root = self.get_root_node()
+        current_paths_index = self._get_cached(
+            ("paths_index", current_root, frozenset(other_leaves), other_nodes),
+            lambda graph: _index_paths_by_matching_key(_with_edge_data_dicts(
+                graph, _simple_edge_paths(
+                    graph, current_root, other_leaves,
+                    allowed_nodes=_nodes_reaching(
+                        graph, other_leaves,
+                        passable=lambda n: _is_skipable_node(n) or n in other_nodes)
+                )
+            ))
+        )
+
+        # A path whose leaf and polarity are not found at all can never match, so that is
+        # checked for all paths before walking any of them.
+        for other_key, _ in other_signatures:
+            if other_key not in current_paths_index:
+                return [], [], False
 
         # Find the paths in current graph that logically matches every path of other graph.
-        matched_paths = []
         matching_groups = []
-        for other_path in other_paths:
-            matchings_paths = []
-            for cur_path in current_paths:
-                if _paths_logically_match(cur_path, other_path):
-                    matchings_paths.append(cur_path)
+        for other_path, (other_key, other_skeleton) in zip(other_paths_structure,
+                                                            other_signatures):
+            matchings_paths = _find_logically_matching_paths(
+                current_paths_index[other_key], other_path, other_skeleton)
             if not matchings_paths:
                 return [], [], False
-            matched_paths.append(other_path)
             matching_groups.append(matchings_paths)
 
+        matched_paths = _with_current_timestamps(other_paths_structure)
+        matching_groups = [_with_current_timestamps(group) for group in matching_groups]
+
         return matched_paths, matching_groups, True
 
     def _logically_remove_path_set(self, paths):
-        for p in paths:
-            self.graph.colorize_path(p)
+        # Paths usually share edges, so every edge is colorized once.
+        self.graph.colorize_edges({(e[0], e[1], e[2]) for p in paths for e in p})
         self.graph.build_colorization_scheme()
         # self.visualize(title="Graph before performing removal", show_colorization=True)
         self.graph.disconnect_fully_colorized_sub_dag()
@@ -872,11 +1007,13 @@ class TimedPropertyGraph:
         return last_common_node
 
     def _find_subgraph_most_recent_timestamp(self, source=None):
-        if source:
-            edges = self.graph.edges(descendants(self.graph, source), keys=True)
-        else:
-            edges = self.graph.edges(keys=True)
-        return max([self.graph.edges[e[0], e[1], e[2]][TIMESTAMP_PROPERTY_NAME] for e in edges])
+        succ = self.graph._succ
+        # Edges out of source itself are not part of the subgraph below it.
+        nodes = _nodes_reachable_from(self.graph, source) - {source} if source else succ
+        return max(data.get(TIMESTAMP_PROPERTY_NAME)
+                   for n in nodes
+                   for keydict in succ[n].values()
+                   for data in keydict.values())
 
     def _get_assumption_conclusion_edges_timestamps(self):
         """Returns the timestamps of top-level edges to assumption, conclusion subgraphs."""
@@ -895,122 +1032,79 @@ class TimedPropertyGraph:
 
         return assumption_timestamp, conclusion_timestamp
 
-    def _retain_only_edges_that_starts_with(self, path_prefix):
-        """Retains only the edges belonging to a path that starts with given prefix.
-
-        All edges that do not belong to such a prefixed path are removed from the graph,
-        along with orphan nodes.
-
-        :param path_prefix: A path prefix represented as a sequence of edges in the form
-                of two-tuples.
-        """
-        final_prefix_node = path_prefix[-1][1]
-        leaf_nodes = self.get_leaves()
-        suffix_paths = all_simple_edge_paths(self.graph, final_prefix_node, leaf_nodes)
-        all_edges_to_retain = list(path_prefix)
-        for p in suffix_paths:
-            all_edges_to_retain.extend(p)
-
-        edges_to_remove = [e for e in self.graph.edges if not _edge_in_set(all_edges_to_retain, e)]
-        self.graph.remove_edges_from(edges_to_remove)
-
-        nodes_to_remove = [n for n in self.graph.nodes if self.graph.degree(n) == 0]
-        self.graph.remove_nodes_from(nodes_to_remove)
-
-        self._fix_orphan_logical_operators()
-
     def _fix_orphan_logical_operators(self):
         """Cleans the graph from orphan AND and NOT operators."""
         self._remove_orphan_and_operators()
         self._collapse_sequential_not_operators()
 
     def _remove_orphan_and_operators(self):
-        and_nodes_to_remove = []
-        for n in self.graph.nodes:
-            if isinstance(n, AndOperator) and self.graph.out_degree(n) < 2:
-                and_nodes_to_remove.append(n)
+        # Out degree is read straight from successors, as an AND node with two or more
+        # successors can never be an orphan.
+        and_nodes_to_remove = [
+            n for n, successors in self.graph._succ.items()
+            if isinstance(n, AndOperator) and len(successors) < 2
+            and sum(len(keydict) for keydict in successors.values()) < 2
+        ]
         for n in and_nodes_to_remove:
             self._remove_orphan_and_operator(n)
 
     def _remove_orphan_and_operator(self, and_node):
-        predecessor_edges = list(self.graph.in_edges(and_node, keys=True))
-        successor_edge = list(self.graph.edges(and_node, keys=True))[0]
-        successor_data = self.graph.edges[successor_edge[0], successor_edge[1], successor_edge[2]]
+        predecessor_edges = list(self.graph.in_edges(and_node, data=True))
+        _, successor, successor_data = list(self.graph.edges(and_node, data=True))[0]
 
         if predecessor_edges:  # AND node is not the root node.
-            for predecessor_edge in predecessor_edges:
-                predecessor_data = \
-                    self.graph.edges[predecessor_edge[0], predecessor_edge[1], predecessor_edge[2]]
+            for predecessor, _, predecessor_data in predecessor_edges:
                 # Retain data from the edge with the older timestamp.
-                if (predecessor_data[TIMESTAMP_PROPERTY_NAME] <
-                        successor_data[TIMESTAMP_PROPERTY_NAME]):
-                    data_to_retain = successor_data.copy()
-                    data_to_retain.update(predecessor_data)
-                else:
-                    data_to_retain = predecessor_data.copy()
-                    data_to_retain.update(successor_data)
-                self._add_edge(predecessor_edge[0], successor_edge[1], data_to_retain)
+                self._add_edge(predecessor, successor,
+                               _merge_timestamped_data(predecessor_data, successor_data))
         else:  # AND node is the root node.
-            self.root_node = successor_edge[1]
+            self.root_node = successor
             # Since no new edge is added, propagate data with older timestamp to deeper nodes.
-            self._propagate_edge_data_to_deeper_edges(successor_edge[1], successor_data)
+            self._propagate_edge_data_to_deeper_edges(successor, successor_data)
 
         self.graph.remove_node(and_node)
 
     def _collapse_sequential_not_operators(self):
-        more_not_pairs_to_remove = True
-        while more_not_pairs_to_remove:
-            more_not_pairs_to_remove = False
-            for e in self.graph.edges:
-                if isinstance(e[0], NotOperator) and isinstance(e[1], NotOperator):
-                    self._collapse_not_operators_pair(e[0], e[1])
-                    more_not_pairs_to_remove = True
-                    break
+        # Pairs are collapsed in the order they are met into graph's edges, i.e. by the
+        # position of their first NOT among graph's nodes. Collapsing a pair only adds edges
+        # to the predecessors of the first NOT, so only these need to be checked again.
+        nodes = list(self.graph.nodes)
+        position = {n: i for i, n in enumerate(nodes)}
+        candidates = [i for i, n in enumerate(nodes) if isinstance(n, NotOperator)]
+        while candidates:
+            not1 = nodes[heapq.heappop(candidates)]
+            if not1 not in self.graph:
+                continue  # Already collapsed.
+            not2 = next((n for n in self.graph._succ[not1] if isinstance(n, NotOperator)), None)
+            if not2 is None:
+                continue
+            not_predecessors = [n for n in self.graph._pred[not1] if isinstance(n, NotOperator)]
+            self._collapse_not_operators_pair(not1, not2)
+            for n in not_predecessors:
+                heapq.heappush(candidates, position[n])
 
     def _collapse_not_operators_pair(self, not1, not2):
-        not1_predecessor_edges = list(self.graph.in_edges(not1, keys=True))
-        not2_successor_edge = list(self.graph.edges(not2, keys=True))[0]
+        not1_predecessor_edges = list(self.graph.in_edges(not1, data=True))
+        _, not2_successor, not2_out_data = list(self.graph.edges(not2, data=True))[0]
 
         # Between the data of out edge of second NOT and the data of the edge between the
         # two NOT nodes, keep the ones whose timestamp is older.
         between_data = self.graph.edges[not1, not2, 0]
-        not2_out_data = \
-            self.graph.edges[not2_successor_edge[0], not2_successor_edge[1], not2_successor_edge[2]]
-        if between_data[TIMESTAMP_PROPERTY_NAME] < not2_out_data[TIMESTAMP_PROPERTY_NAME]:
-            data_to_retain = not2_out_data.copy()
-            data_to_retain.update(between_data)
-        else:
-            data_to_retain = between_data.copy()
-            data_to_retain.update(not2_out_data)
+        data_to_retain = _merge_timestamped_data(between_data, not2_out_data)
 
         if not1_predecessor_edges:  # First NOT is not the root node.
-            for predecessor_edge in not1_predecessor_edges:
-                predecessor_data = \
-                    self.graph.edges[predecessor_edge[0], predecessor_edge[1], predecessor_edge[2]]
-                if (predecessor_data[TIMESTAMP_PROPERTY_NAME] <
-                        data_to_retain[TIMESTAMP_PROPERTY_NAME]):
-                    new_data = data_to_retain.copy()
-                    new_data.update(predecessor_data)
-                else:
-                    new_data = predecessor_data.copy()
-                    new_data.update(data_to_retain)
-                self._add_edge(predecessor_edge[0], not2_successor_edge[1], new_data)
+            for predecessor, _, predecessor_data in not1_predecessor_edges:
+                self._add_edge(predecessor, not2_successor,
+                               _merge_timestamped_data(predecessor_data, data_to_retain))
         else:  # First NOT is the root node.
-            self.root_node = not2_successor_edge[1]
-            self._propagate_edge_data_to_deeper_edges(not2_successor_edge[1], data_to_retain)
+            self.root_node = not2_successor
+            self._propagate_edge_data_to_deeper_edges(not2_successor, data_to_retain)
 
         self.graph.remove_nodes_from([not1, not2])
 
     def _propagate_edge_data_to_deeper_edges(self, source_node, data):
-        for deeper_edge in self.graph.edges(source_node, keys=True):
-            deeper_edge_data = self.graph.edges[deeper_edge[0], deeper_edge[1], deeper_edge[2]]
-            if (data[TIMESTAMP_PROPERTY_NAME] < deeper_edge_data[TIMESTAMP_PROPERTY_NAME]):
-                data_to_retain = deeper_edge_data.copy()
-                data_to_retain.update(data)
-            else:
-                data_to_retain = data.copy()
-                data_to_retain.update(deeper_edge_data)
-            self.graph.edges[deeper_edge[0], deeper_edge[1], deeper_edge[2]].update(data_to_retain)
+        for _, _, deeper_edge_data in self.graph.edges(source_node, data=True):
+            deeper_edge_data.update(_merge_timestamped_data(data, deeper_edge_data))
 
     def _clean_orphan_timestamps(self):
         """Removes timestamps that don't match the timestamp of any path they participate to.
@@ -1118,18 +1212,25 @@ class TimedPropertyGraph:
 
         :param n: Node from which will start propagating newest timestamp upwards.
         """
-        in_edges = list(self.graph.in_edges(n, data=TIMESTAMP_PROPERTY_NAME, keys=True))
-
-        if len(in_edges) > 1:
-            raise NotImplementedError(
-                    "Fixing of upper timestamps only works for single in edge nodes.")
-        elif len(in_edges) == 1:
-            max_out_timestamp = max(
-                    [e[2] for e in self.graph.edges(n, data=TIMESTAMP_PROPERTY_NAME)])
-            e = in_edges[0]
-            if max_out_timestamp > e[3]:
-                self.graph.edges[e[0], e[1], e[2]][TIMESTAMP_PROPERTY_NAME] = max_out_timestamp
-                self._fix_upper_timestamps(e[0])
+        succ = self.graph._succ
+        pred = self.graph._pred
+        while True:
+            # Data dicts of in edges are fetched once and updated in place.
+            in_edges = [(u, d) for u, keydict in pred[n].items() for d in keydict.values()]
+
+            if len(in_edges) > 1:
+                raise NotImplementedError(
+                        "Fixing of upper timestamps only works for single in edge nodes.")
+            elif len(in_edges) == 1:
+                max_out_timestamp = max(d.get(TIMESTAMP_PROPERTY_NAME)
+                                        for keydict in succ[n].values()
+                                        for d in keydict.values())
+                upper_node, in_data = in_edges[0]
+                if max_out_timestamp > in_data.get(TIMESTAMP_PROPERTY_NAME):
+                    in_data[TIMESTAMP_PROPERTY_NAME] = max_out_timestamp
+                    n = upper_node  # Continue propagating from the upper node.
+                    continue
+            return
 
     # def find_time_matching_paths_from_node_to_root(self, start_node, other_graph,
     #                                                other_start_node):
@@ -1289,8 +1390,7 @@ class PredicateGraph(TimedPropertyGraph):
 
         # Build predicate node first, so hash doesn't change. Implement it better later.
         self._predicate_node = PredicateNode(predicate)
-        for arg in args:
-            self._predicate_node.add_argument(arg)
+        self._predicate_node.arguments = list(args)
 
         self._add_node(self._predicate_node)
         for arg in args:
@@ -1303,14 +1403,14 @@ class PredicateGraph(TimedPropertyGraph):
         for k, v in self.__dict__.items():
             setattr(copy_obj, k, deepcopy(v, memo))
 
-        copy_obj.graph = copy_obj.graph.copy()  # Unfreeze copied graph.
+        # Deep copies of graphs are never frozen.
 
         return copy_obj
 
-    def get_copy(self):
+    def _copy_with_graph(self, graph):
         # TODO: Provide a more elegant fix.
         copy_obj = type(self)(self._predicate_node.predicate, *self._predicate_node.arguments)
-        copy_obj.graph = self.graph.copy()
+        copy_obj.graph = graph
         copy_obj.root_node = self.root_node  # Node references remain the same.
         copy_obj.time_source = self.time_source
         copy_obj.property_textual_representation = self.property_textual_representation
@@ -1324,38 +1424,68 @@ class PredicateGraph(TimedPropertyGraph):
 
 
 class TemporalNode:
+    # Nodes are numerous, so they are kept without a per instance dict.
+    __slots__ = ()
 
     def __init__(self):
         pass
 
 
 class PredicateNode(TemporalNode):
+    """Node of a predicate, identified by its string representation.
+
+    String representation and hash are cached, so a node should not be modified while
+    it belongs to a graph. Instead, a modified copy should replace it, as replace_nodes()
+    does.
+    """
+    __slots__ = ("_predicate", "arguments", "_str_representation", "_hash")
 
     def __init__(self, predicate):
         super().__init__()
-        self.predicate = predicate
+        self._predicate = predicate
         self.arguments = []
+        # String representation identifies the node, so it is computed only upon changes,
+        # along with its hash.
+        self._str_representation = None
+        self._hash = None
+
+    @property
+    def predicate(self):
+        return self._predicate
+
+    @predicate.setter
+    def predicate(self, predicate):
+        self._predicate = predicate
+        self._clear_cached_representation()
 
     def __str__(self):
-        str_repr = "{}({})".format(
-            str(self.predicate), ",".join([str(arg) for arg in self.arguments]))
-        str_repr = str_repr.replace(" ", "_")
-        return str_repr
+        if self._str_representation is None:
+            str_repr = "{}({})".format(
+                str(self.predicate), ",".join([str(arg) for arg in self.arguments]))
+            # Equal nodes share the same interned string, so comparing them is immediate.
+            self._str_representation = sys.intern(str_repr.replace(" ", "_"))
+        return self._str_representation
 
     def __hash__(self):
-        return hash(self.__str__())
+        if self._hash is None:
+            self._hash = hash(self.__str__())
+        return self._hash
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if isinstance(other, PredicateNode):
-            return self.__str__() == other.__str__()
+            # Different hashes reject most unequal nodes without comparing strings.
+            return hash(self) == hash(other) and self.__str__() == other.__str__()
         else:
-            return None
+            return NotImplemented
 
     def __repr__(self):
         return self.__str__()
 
     def add_argument(self, argument):
         self.arguments.append(argument)
+        self._clear_cached_representation()
         # self.arguments.sort()
 
     def replace_argument(self, old, new):
@@ -1363,11 +1493,27 @@ class PredicateNode(TemporalNode):
         index = self.arguments.index(old)
         self.arguments.pop(index)
         self.arguments.insert(index, new)
+        self._clear_cached_representation()
+
+    def __getstate__(self):
+        # String hashes are randomized per process, so cached hash should not be pickled.
+        return {name: getattr(self, name) for name in self.__slots__ if name != "_hash"}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._hash = None
+
+    def _clear_cached_representation(self):
+        self._str_representation = None
+        self._hash = None
 
 
 class MonitoredVariable(TemporalNode):
     # TODO: Make a registrar so monitored variables with the same name, are the same
     # object in memory too, also encasuplating the real variable.
+    __slots__ = ("monitored_variable",)
+
     def __init__(self, monitored_variable):
         super().__init__()
         self.monitored_variable = monitored_variable
@@ -1379,6 +1525,8 @@ class MonitoredVariable(TemporalNode):
         return hash(self.monitored_variable)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         try:
             return self.monitored_variable == other.monitored_variable
         except AttributeError:
@@ -1389,6 +1537,8 @@ class MonitoredVariable(TemporalNode):
 
 
 class TimestampedPath:
+    __slots__ = ("path", "timestamp")
+
     def __init__(self, path, timestamp):
         self.path = path
         self.timestamp = timestamp
@@ -1405,31 +1555,43 @@ class ConstantProperty:
 class NoPositiveAndNegativePredicatesSimultaneously(ConstantProperty):
     def apply(self):
         """Removes all paths to predicates that has been invalidated by newer ones."""
-        predicate_nodes = [
-            n for n in self.property_graph.graph.nodes if isinstance(n, PredicateNode)]
+        graph = self.property_graph.graph
+        predicate_nodes = [n for n in graph.nodes if isinstance(n, PredicateNode)]
+        if not predicate_nodes:
+            return
 
-        for pred_node in predicate_nodes:
-            paths = list(_all_simple_edge_paths_passing_from_node(
-                self.property_graph.graph, self.property_graph.get_root_node(),
-                self.property_graph.get_leaves(), pred_node)
-            )
-            if paths:
-                paths = [
-                    TimestampedPath(p, self.property_graph.find_path_timestamp(p)) for p in paths]
-                paths.sort(reverse=True, key=lambda path: path.timestamp)
+        root = self.property_graph.get_root_node()
+        leaves = self.property_graph.get_leaves()
+        # Only predicates reached by both negated and non-negated paths can be invalidated.
+        ambiguous_nodes = _find_ambiguously_negated_nodes(graph, root)
 
-                is_most_recent_negated = bool(count_nots_in_path(paths[0].path) % 2)
+        for pred_node in predicate_nodes:
+            if pred_node not in ambiguous_nodes:
+                continue
+            summarized_paths = _summarized_paths_passing_from_node(graph, root, leaves,
+                                                                   pred_node)
+            if summarized_paths:
+                summarized_paths.sort(reverse=True, key=lambda summary: summary[1])
+                paths = [TimestampedPath(p, t) for p, t, _ in summarized_paths]
+
+                negations = [nots_count % 2 for _, _, nots_count in summarized_paths]
                 paths_to_remove = []
-                for p in paths:
-                    is_negated = bool(count_nots_in_path(p.path) % 2)
-                    if is_most_recent_negated != is_negated:
-                        drop_index = paths.index(p)
+                for drop_index, is_negated in enumerate(negations):
+                    if negations[0] != is_negated:
                         paths_to_remove = paths[drop_index:]
                         break
 
+                structure_version = graph.structure_version
                 self.property_graph._logically_remove_path_set([p.path for p in paths_to_remove])
                 self.property_graph._fix_orphan_logical_operators()
 
+                if graph.structure_version != structure_version:
+                    # Root and leaves may have changed, while removed paths may leave more
+                    # predicates with paths of a single polarity.
+                    root = self.property_graph.get_root_node()
+                    leaves = self.property_graph.get_leaves()
+                    ambiguous_nodes = _find_ambiguously_negated_nodes(graph, root)
+
 
 class NoComparisonRelativeTimestampAlone(ConstantProperty):
     """Property that a graph cannot have comparison relative timestamps without a fixed one.
@@ -1513,14 +1675,53 @@ def find_path_timestamp(path):
     :param path: A path represented as a sequence of edges in the form of four-tuples.
             (source, target, key, timestamp)
     """
-    return min([e[3] for e in path])
+    return min(e[3] for e in path)
 
 
 def count_nots_in_path(path):
-    all_nots = [e[0] for e in path if isinstance(e[0], NotOperator)]
-    if isinstance(path[-1][1], NotOperator):
-        all_nots.append(path[-1][1])
-    return len(all_nots)
+    # A NOT leaf of the path is counted too.
+    return (sum(1 for e in path if isinstance(e[0], NotOperator))
+            + isinstance(path[-1][1], NotOperator))
+
+
+def _list_edges(graph):
+    """Lists all edges of a multigraph in (u, v, key, data) form, in networkx's edges order.
+
+    Adjacency dicts are iterated directly, to avoid the construction of edge views.
+    """
+    return [(u, v, k, data)
+            for u, neighbors in graph._adj.items()
+            for v, keydict in neighbors.items()
+            for k, data in keydict.items()]
+
+
+def _with_edge_data_dicts(graph, paths):
+    """Returns given paths, with the data dict of each edge in place of its timestamp."""
+    adj = graph._adj
+    return [[(u, v, k, adj[u][v][k]) for u, v, k, _ in p] for p in paths]
+
+
+def _with_current_timestamps(paths):
+    """Returns a copy of given paths, filled with the current timestamps of their edges.
+
+    :param paths: Paths whose edges are in (source, target, key, data dict) form.
+    """
+    return [[(u, v, k, data.get(TIMESTAMP_PROPERTY_NAME)) for u, v, k, data in p]
+            for p in paths]
+
+
+def _frozen_subgraph(graph, nodes):
+    """Returns a standalone frozen copy of the subgraph induced by given nodes."""
+    if nodes is None:
+        return None
+    return networkx.freeze(graph.subgraph(nodes).copy())
+
+
+def _frozen_subgraph_sharing_data(graph, nodes):
+    """Returns a frozen subgraph induced by given nodes, that shares data with the graph."""
+    if nodes is None:
+        return None
+    return graph.frozen_subgraph_sharing_data(nodes)
 
 
 def _edges_match(e1, e2):
@@ -1539,19 +1740,6 @@ def _edges_match(e1, e2):
     return True
 
 
-def _edge_in_set(iterable, edge):
-    for e in iterable:
-        if _edges_match(e, edge):
-            return True
-    return False
-
-
-def _fill_paths_with_timestamps(graph, paths):
-    for p in paths:
-        yield [(u, v, k, graph.get_edge_data(u, v, key=k)[TIMESTAMP_PROPERTY_NAME])
-               for u, v, k in p]
-
-
 def _paths_logically_match(path1, path2):
     # Make sure that both paths are either positive or negative.
     if (count_nots_in_path(path1) % 2) != (count_nots_in_path(path2) % 2):
@@ -1561,53 +1749,110 @@ def _paths_logically_match(path1, path2):
     # if not _find_path_timestamp(path1).matches(_find_path_timestamp(path2)):
     #     return False
 
-    def _is_skipable_node(node):
-        return isinstance(node, AndOperator) or isinstance(node, NotOperator) \
-               or isinstance(node, ImplicationOperator)
-
     cur_node_1 = path1[-1][1]  # start checking from the end
     cur_node_2 = path2[-1][1]
     if cur_node_1 != cur_node_2:
         return False
 
+    return _path_nodes_logically_match(path1, path2)
+
+
+def _path_nodes_logically_match(path1, path2):
+    """Checks whether the non skipable nodes of two paths match, walking them backwards.
+
+    Paths are expected to end to the same leaf and to have the same polarity.
+    """
+    # Skipable nodes are checked inline, as this runs for every pair of compared paths.
     index_1 = len(path1) - 1
     index_2 = len(path2) - 1
     while index_1 >= 0:
         cur_node_1 = path1[index_1][0]
         index_1 -= 1
-        if _is_skipable_node(cur_node_1):
+        if isinstance(cur_node_1, LogicalOperator):
             continue
 
         cur_node_2 = path2[index_2][0]
         index_2 -= 1
-        while index_2 >= 0 and _is_skipable_node(cur_node_2):
+        while index_2 >= 0 and isinstance(cur_node_2, LogicalOperator):
             cur_node_2 = path2[index_2][0]
             index_2 -= 1
 
-        if not ((isinstance(cur_node_1, LogicalOperator) and isinstance(cur_node_2, LogicalOperator)
-                 and cur_node_1.logically_matches(cur_node_2)) or cur_node_1 == cur_node_2):
+        # Node of first path is never a logical operator here, so only equality is checked.
+        if cur_node_1 != cur_node_2:
             return False
 
     return True
 
 
-def _remove_common_starting_subpath_from_paths(paths):
-    """Removes common starting subpath from given sequence of paths.
+def _is_skipable_node(node):
+    # AND, NOT and implication nodes are all the logical operators there are, so a single
+    # class check covers them.
+    return isinstance(node, LogicalOperator)
+
 
-    Subpath removal is performed in-place into the edge-sequence of each path.
+def _index_paths_by_matching_key(paths):
+    """Groups paths by their matching key, indexing every group by the paths skeletons.
 
-    :param paths: An iterable containing paths represented as lists of edges.
+    :return: A dict that maps matching keys to (entries, by_skeleton, by_prefix) tuples.
+            Entries is a list of (path, skeleton) tuples, in the order of given paths.
+            By_skeleton maps skeletons and by_prefix maps the proper prefixes of
+            skeletons, to the positions of the corresponding entries.
     """
-    if len(paths) > 1:
-        for edge in paths[0][::-1]:
-            for path in paths:
-                if not _edges_match(path[-1], edge):
-                    break
-            else:
-                for path in paths:
-                    path.remove(edge)
-                    continue
-            break
+    index = {}
+    for p in paths:
+        key, skeleton = _path_signature(p)
+        entries, by_skeleton, by_prefix = index.setdefault(key, ([], {}, {}))
+        position = len(entries)
+        entries.append((p, skeleton))
+        by_skeleton.setdefault(skeleton, []).append(position)
+        for length in range(len(skeleton)):
+            by_prefix.setdefault(skeleton[:length], []).append(position)
+    return index
+
+
+def _find_logically_matching_paths(indexed_paths, path, skeleton):
+    """Finds the indexed paths that logically match given path.
+
+    It is equivalent to checking every indexed path against given one with
+    _paths_logically_match(), though only the paths that may match are ever visited.
+
+    :param indexed_paths: Paths with the same matching key as given path, indexed by
+            _index_paths_by_matching_key().
+    :param path: Path to be matched.
+    :param skeleton: Skeleton of path to be matched.
+
+    :return: A list of the matching indexed paths, in their indexing order.
+    """
+    entries, by_skeleton, by_prefix = indexed_paths
+    # Paths whose skeleton is a prefix of the matched one, always match.
+    positions = [position
+                 for length in range(len(skeleton) + 1)
+                 for position in by_skeleton.get(skeleton[:length], [])]
+    # Longer skeletons can only match when matched path starts from a non skipable node,
+    # in which case the matched skeleton should be their prefix and a full walk is required.
+    if not _is_skipable_node(path[0][0]):
+        positions.extend(position for position in by_prefix.get(skeleton, [])
+                         if _path_nodes_logically_match(entries[position][0], path))
+    positions.sort()
+    return [entries[position][0] for position in positions]
+
+
+def _path_signature(path):
+    """Returns the matching key and the skeleton of a path, in a single pass over it.
+
+    Matching key consists of the leaf and the polarity of the path, that should be equal
+    for paths to match. Skeleton consists of the non skipable nodes of the path, starting
+    from the leaf.
+    """
+    leaf = path[-1][1]
+    nots_count = 1 if isinstance(leaf, NotOperator) else 0
+    skeleton = []
+    for e in reversed(path):
+        if not _is_skipable_node(e[0]):
+            skeleton.append(e[0])
+        elif isinstance(e[0], NotOperator):
+            nots_count += 1
+    return (leaf, nots_count % 2), tuple(skeleton)
 
 
 def _merge_timestamped_data(data_dict1, data_dict2, keep_newer=False):
@@ -1629,7 +1874,156 @@ def _merge_timestamped_data(data_dict1, data_dict2, keep_newer=False):
     return merged
 
 
-def _all_simple_edge_paths_passing_from_node(graph, source, target, intermediate):
-    prefixes = all_simple_edge_paths(graph, source, intermediate)
-    suffixes = all_simple_edge_paths(graph, intermediate, target)
-    return [prefix+suffix for suffix in suffixes for prefix in prefixes]
\ No newline at end of file
+def _summarized_paths_passing_from_node(graph, source, target, intermediate):
+    """Finds all simple paths from source to target that pass from intermediate node.
+
+    Paths are combined out of the paths before and after intermediate node, whose
+    timestamps and NOT nodes are summarized once per part, instead of once per combined
+    path. When no path reaches intermediate node, the paths after it are never searched.
+
+    :return: A list of (path, timestamp, nots count) three-tuples, where timestamp and
+            nots count are the ones returned by find_path_timestamp() and
+            count_nots_in_path() respectively for the path.
+    """
+    prefixes = [(p, find_path_timestamp(p), sum(isinstance(e[0], NotOperator) for e in p))
+                for p in _simple_edge_paths(graph, source, intermediate)]
+    if not prefixes:
+        return []
+    summarized_paths = []
+    for suffix in _simple_edge_paths(graph, intermediate, target):
+        suffix_timestamp = find_path_timestamp(suffix)
+        suffix_nots = count_nots_in_path(suffix)
+        for prefix, prefix_timestamp, prefix_nots in prefixes:
+            # On equal timestamps, min() keeps the first one, as on the combined path.
+            summarized_paths.append((prefix + suffix,
+                                     min(prefix_timestamp, suffix_timestamp),
+                                     prefix_nots + suffix_nots))
+    return summarized_paths
+
+
+def _simple_edge_paths(graph, source, targets, allowed_nodes=None):
+    """Generates all simple paths from source to any of the targets in a multigraph.
+
+    It behaves like networkx's all_simple_edge_paths(), but walks adjacency dicts directly
+    and includes the timestamp of each edge into the generated paths.
+
+    :param graph: A networkx multigraph.
+    :param source: Node where paths start.
+    :param targets: A single node or an iterable of nodes where paths end.
+    :param allowed_nodes: When provided, paths only pass through the nodes it contains.
+
+    :return: A generator of paths, each represented as a list of edges in the form of
+            four-tuples. (source, target, key, timestamp)
+    """
+    if source not in graph:
+        raise NodeNotFound(f"source node {source} not in graph")
+    targets = {targets} if targets in graph else set(targets)
+    cutoff = len(graph) - 1
+    if source in targets or cutoff < 1:
+        return
+
+    adj = graph._adj
+
+    def out_edges(u):
+        return ((u, v, k, data.get(TIMESTAMP_PROPERTY_NAME))
+                for v, keydict in adj[u].items() for k, data in keydict.items())
+
+    visited = dict.fromkeys([source])
+    path = []
+    stack = [out_edges(source)]
+    while stack:
+        edge = next(stack[-1], None)
+        if edge is None:
+            stack.pop()
+            visited.popitem()
+            if path:
+                path.pop()
+        elif len(path) + 1 < cutoff:
+            if edge[1] in targets:
+                yield path + [edge]
+            elif edge[1] not in visited and (allowed_nodes is None or edge[1] in allowed_nodes):
+                visited[edge[1]] = None
+                path.append(edge)
+                stack.append(out_edges(edge[1]))
+        else:  # Path reached cutoff length.
+            for e in itertools.chain([edge], stack.pop()):
+                if e[1] in targets:
+                    yield path + [e]
+            visited.popitem()
+            if path:
+                path.pop()
+
+
+def _find_ambiguously_negated_nodes(graph, root):
+    """Finds the nodes that full paths with both odd and even number of NOT nodes pass from.
+
+    Parities of the paths from root to each node and from each node to the leaves are
+    propagated in two passes over a topological order, so no path is ever enumerated.
+    Parities are kept as bitmasks, where 1 stands for even and 2 for odd.
+
+    :return: A set of nodes, excluding root and leaves, since no full path passes through
+            them as an intermediate node.
+    """
+    order = list(topological_sort(graph))
+
+    def flip(mask):
+        return ((mask & 1) << 1) | (mask >> 1)
+
+    def count(n, mask):
+        return flip(mask) if isinstance(n, NotOperator) else mask
+
+    up = dict.fromkeys(order, 0)
+    up[root] = count(root, 1)
+    for n in order:
+        for s in graph._succ[n]:
+            up[s] |= count(s, up[n])
+
+    down = {}
+    for n in reversed(order):
+        mask = 0
+        for s in graph._succ[n]:
+            mask |= count(s, down[s])
+        down[n] = mask or 1  # Leaves contribute no NOT node after themselves.
+
+    ambiguous = set()
+    for n in order:
+        if n == root or not graph._succ[n] or not up[n]:
+            continue
+        parities = (down[n] if up[n] & 1 else 0) | (flip(down[n]) if up[n] & 2 else 0)
+        if parities == 3:
+            ambiguous.add(n)
+    return ambiguous
+
+
+def _nodes_reachable_from(graph, source):
+    """Returns the frozenset of nodes that can be reached from source, including source."""
+    succ = graph._succ
+    reachable = {source}
+    frontier = [source]
+    while frontier:
+        n = frontier.pop()
+        for s in succ[n]:
+            if s not in reachable:
+                reachable.add(s)
+                frontier.append(s)
+    return frozenset(reachable)
+
+
+def _nodes_reaching(graph, targets, passable=None):
+    """Returns the set of nodes from which any of the given target nodes can be reached.
+
+    Targets themselves are included into the returned set.
+
+    :param passable: When provided, a callable that given a node returns whether paths
+            are allowed to pass from it. Targets can be reached only through such nodes.
+    """
+    pred = graph._pred
+    reaching = set(targets)
+    frontier = list(reaching)
+    while frontier:
+        n = frontier.pop()
+        for p in pred[n]:
+            if p not in reaching and (passable is None or passable(p)):
+                reaching.add(p)
+                frontier.append(p)
+    return reaching
@@ -7,6 +7,10 @@ MINUS_INFINITE = "-inf"
 
 
 class Timestamp:
+    # Timestamps are created for every monitored event and kept on every edge of the
+    # graphs, so they store their fields in slots instead of a per-instance dict.
+    __slots__ = ("_value",)
+
     def __init__(self, value):
         self._value = value
 
@@ -79,6 +83,8 @@ class Timestamp:
 
 
 class RelativeTimestamp(Timestamp):
+    __slots__ = ("time_source",)
+
     def __init__(self, value, time_source=None):
         super().__init__(value)
         self.time_source = time_source
@@ -122,6 +128,8 @@ class RelativeTimestamp(Timestamp):
 
 
 class LesserThanRelativeTimestamp(RelativeTimestamp):
+    __slots__ = ()
+
     def __repr__(self):
         return "<= " + RelativeTimestamp.__repr__(self)
 
@@ -130,6 +138,8 @@ class LesserThanRelativeTimestamp(RelativeTimestamp):
 
 
 class GreaterThanRelativeTimestamp(RelativeTimestamp):
+    __slots__ = ()
+
     def __repr__(self):
         return ">= " + RelativeTimestamp.__repr__(self)
 
@@ -139,6 +149,26 @@ class GreaterThanRelativeTimestamp(RelativeTimestamp):
 
 def timestamp_sequences_matches(seq1, seq2):
     """Checks if two timestamp sequences match."""
+    return zero_based_timestamp_sequences_matches([to_zero_based_timestamp(t) for t in seq1],
+                                                  [to_zero_based_timestamp(t) for t in seq2])
+
+
+def to_zero_based_timestamp(timestamp):
+    """Returns a timestamp to be used in comparisons of timestamp sequences.
+
+    Relative timestamps are copied and evaluated against a zero-locked time source, while
+    absolute ones are returned as is. Conversion doesn't depend on the rest of the sequence,
+    so timestamps compared many times can be converted only once.
+    """
+    if timestamp.is_absolute():
+        return timestamp
+    zero_based = copy(timestamp)
+    zero_based.set_time_source(time_source.get_zero_locked_timesource())
+    return zero_based
+
+
+def zero_based_timestamp_sequences_matches(seq1, seq2):
+    """Checks if two sequences of timestamps, converted by to_zero_based_timestamp(), match."""
     if len(seq1) != len(seq2):
         raise RuntimeError("Timestamp sequences lengths should match.")
 
@@ -156,28 +186,20 @@ def timestamp_sequences_matches(seq1, seq2):
             shift = t1.get_relative_value() - t2.get_absolute_value()
             break
 
-    matches = True
-    for i in range(len(seq1)):
-        t1 = seq1[i]
-        t2 = seq2[i]
-
-        if t1.is_absolute():
-            t1 = t1.get_shifted_timestamp(shift)
-        else:
-            t1 = copy(t1)
-            t1.set_time_source(time_source.get_zero_locked_timesource())
-
-        if t2.is_absolute():
-            t2 = t2.get_shifted_timestamp(shift)
-        else:
-            t2 = copy(t2)
-            t2.set_time_source(time_source.get_zero_locked_timesource())
+    for t1, t2 in zip(seq1, seq2):
+        # Shifting both absolute timestamps of a pair doesn't affect their overlap, so
+        # only align absolute timestamps compared to relative ones.
+        t1_absolute = t1.is_absolute()
+        if t1_absolute != t2.is_absolute():
+            if t1_absolute:
+                t1 = t1.get_shifted_timestamp(shift)
+            else:
+                t2 = t2.get_shifted_timestamp(shift)
 
         if not t1.matches(t2):
-            matches = False
-            break
+            return False
 
-    return matches
+    return True
 
 
 def is_interval_subset(interval1, interval2):
@@ -23,8 +23,9 @@ def prove_set_of_properties(property_graphs, execution_graph, theorem_selector=N
     theorems, properties_to_prove = split_into_theorems_and_properties_to_prove(property_graphs)
 
     for p in negate_conclusion_part_of_properties(properties_to_prove):
-        proved, theorems_applied, intermediate_graphs = \
-            prove_property(execution_graph, p, theorems, theorem_selector)
+        proved, theorems_applied, intermediate_graphs = prove_property(
+            execution_graph, p, theorems, theorem_selector,
+            keep_intermediate_graphs=full_visualization_enabled)
 
         if proved:
             if full_visualization_enabled:
@@ -36,7 +37,8 @@ def prove_property(execution_graph,
                    property_graph,
                    theorems,
                    theorem_selector=None,
-                   prove_if_fully_reduced=PROVE_IF_FULLY_REDUCED):
+                   prove_if_fully_reduced=PROVE_IF_FULLY_REDUCED,
+                   keep_intermediate_graphs=True):
     """Proves that given property holds into given execution graph by utilizing given theorems.
 
     :param execution_graph: Execution graph into which given property should be proved.
@@ -51,6 +53,8 @@ def prove_property(execution_graph,
     :param prove_if_fully_reduced: If set to True, a property is considered proved only if
         execution graph can be converted to its form. If set to False, it is enough for a
         property to be contained into execution graph to be considered proved.
+    :param keep_intermediate_graphs: If set to False, execution graph is not copied after
+        each theorem application and an empty list of intermediate graphs is returned.
 
     :return:
         -proved: True in case given property has been proved, otherwise False.
@@ -74,7 +78,8 @@ def prove_property(execution_graph,
             property_graph,
             theorems,
             theorem_selector=ts,
-            prove_if_fully_reduced=prove_if_fully_reduced
+            prove_if_fully_reduced=prove_if_fully_reduced,
+            keep_intermediate_graphs=keep_intermediate_graphs
         )
 
         if proved:
@@ -158,7 +163,8 @@ def _prove_property_with_selector(execution_graph,
                                   property_graph,
                                   theorems,
                                   theorem_selector,
-                                  prove_if_fully_reduced=PROVE_IF_FULLY_REDUCED):
+                                  prove_if_fully_reduced=PROVE_IF_FULLY_REDUCED,
+                                  keep_intermediate_graphs=True):
     global prover_invocations
 
     temp_graph = execution_graph.get_copy()  # Modify a separate graph for each property.
@@ -166,7 +172,7 @@ def _prove_property_with_selector(execution_graph,
 
     proved = False
     theorems_applied = []
-    intermediate_graphs = [temp_graph.get_copy()]
+    intermediate_graphs = [temp_graph.get_copy()] if keep_intermediate_graphs else []
     while len(theorems_applied) < MAX_PROOF_PATH:
         possible_theorems = find_possible_theorem_applications(temp_graph, theorems)
         if not possible_theorems:
@@ -180,7 +186,8 @@ def _prove_property_with_selector(execution_graph,
         apply_theorem(temp_graph, next_theorem)
         # temp_graph.visualize("New execution graph.")
         theorems_applied.append(next_theorem)
-        intermediate_graphs.append(temp_graph.get_copy())
+        if keep_intermediate_graphs:
+            intermediate_graphs.append(temp_graph.get_copy())
 
         if prove_if_fully_reduced:
             # Check after each theorem application if property has been proved.
@@ -1,7 +1,10 @@
 from copy import copy
+import os
 import random
 import string
 
+from joblib import Parallel, delayed
+
 import lovpy.logic.prover as prover
 import lovpy.logic.properties as lovpy_properties
 from lovpy.monitor.monitored_predicate import Call, ReturnedBy, CalledBy
@@ -15,6 +18,7 @@ from . import io
 
 
 LOGGER_NAME = "lovpy.models.dataset_generator"
+GENERATION_BATCH_SIZE = 50
 
 
 class DatasetEntity:
@@ -777,6 +781,53 @@ class DatasetIterator:
         return next_sample
 
 
+def generate_samples_in_parallel(properties, size, max_depth,
+                                 random_expansion_probability=0.7,
+                                 negative_samples_percentage=0.8,
+                                 batch_size=GENERATION_BATCH_SIZE,
+                                 seed=None,
+                                 verbose=False):
+    """Generates samples out of given properties, splitting the work across all CPU cores.
+
+    Samples are generated in batches of batch_size, each one by a generator seeded anew, so
+    batches are independent of each other.
+
+    :param seed: Seed of the first batch, with subsequent batches seeded by consecutive
+            values. When None, batch seeds are drawn from the global random generator.
+    :param verbose: When True, progress is reported once per completed batch.
+
+    :return: A list of DatasetEntity samples.
+    """
+    batch_sizes = [batch_size] * (size // batch_size)
+    if size % batch_size:
+        batch_sizes.append(size % batch_size)
+    if seed is None:
+        seeds = [random.getrandbits(32) for _ in batch_sizes]
+    else:
+        seeds = range(seed, seed+len(batch_sizes))
+    n_jobs = min(os.cpu_count() or 1, len(batch_sizes))
+
+    if verbose:
+        print(f"\tGenerating {size} samples using {n_jobs} workers...")
+    batches = Parallel(n_jobs=n_jobs, backend="loky", return_as="generator")(
+        delayed(_generate_samples_batch)(properties, max_depth, b_size,
+                                         random_expansion_probability,
+                                         negative_samples_percentage, b_seed)
+        for b_size, b_seed in zip(batch_sizes, seeds)
+    )
+
+    samples = []
+    if verbose:
+        print(f"\t\tGenerated 0/{size}...", end="\r")
+    for batch in batches:
+        samples.extend(batch)
+        if verbose:
+            print(f"\t\tGenerated {len(samples)}/{size}...", end="\r")
+    if verbose:
+        print()
+    return samples
+
+
 def get_random_value_in_interval(interval):
     """Returns a random value in the given interval."""
     lower_bound = interval[0] if interval[0] != "-inf" else max(interval[1]-20, 0)
@@ -874,7 +925,7 @@ def _find_non_suppressed_predicates(predicates, validity_intervals):
     :param validity_intervals: The intervals during which corresponding predicates hold.
     """
     preds_by_name = {}
-    for p in predicates:
+    for i, p in enumerate(predicates):
         if isinstance(p.get_root_node(), NotOperator):
             pred_name = str(list(p.graph.successors(p.get_root_node()))[0])
             is_negated = True
@@ -886,7 +937,7 @@ def _find_non_suppressed_predicates(predicates, validity_intervals):
             preds_by_name[pred_name] = []
         preds_by_name[pred_name].append({"timestamp": p.get_most_recent_timestamp(),
                                          "is_negated": is_negated,
-                                         "index": predicates.index(p)})
+                                         "index": i})
 
     non_suppressed_predicates = []
     non_suppressed_validity_intervals = []
@@ -902,3 +953,13 @@ def _find_non_suppressed_predicates(predicates, validity_intervals):
                 break
 
     return non_suppressed_predicates, non_suppressed_validity_intervals
+
+
+def _generate_samples_batch(properties, max_depth, batch_size, random_expansion_probability,
+                            negative_samples_percentage, seed):
+    """Generates a batch of samples using a locally seeded generator."""
+    random.seed(seed)
+    generator = DatasetGenerator(properties, max_depth, batch_size,
+                                 random_expansion_probability=random_expansion_probability,
+                                 negative_samples_percentage=negative_samples_percentage)
+    return list(generator)
@@ -1,14 +1,19 @@
+import itertools
+import os
 import pathlib
+import weakref
 
 import numpy as np
 import pandas as pd
+import tensorflow as tf
+from joblib import Parallel, delayed
 from sklearn.preprocessing import OneHotEncoder
 from stellargraph.layer import DeepGraphCNN
 from stellargraph.mapper import PaddedGraphGenerator
-from stellargraph import StellarGraph
+from stellargraph import StellarGraph, StellarDiGraph
 from tensorflow.keras import Model
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.losses import MeanSquaredError
+from tensorflow.keras.losses import BinaryCrossentropy
 from tensorflow.keras.layers import Dense, Conv1D, MaxPool1D, Flatten, Concatenate
 from tensorflow.keras.utils import Sequence, plot_model
 from tensorflow.keras.metrics import AUC
@@ -23,6 +28,22 @@ from .theorem_proving_model import TheoremProvingModel, TrainingResults
 from .io import save_gnn_models, load_gnn_models
 
 
+# Compile inference of next theorem model with XLA. Padded graphs of each new size trigger
+# a recompilation, so it only pays off when the sizes of proved graphs are few.
+XLA_INFERENCE = os.environ.get("LOVPY_XLA_INFERENCE", 0) == "1"
+# One-hot encoding tables of fitted nodes encoders, as built by _get_encoding_table().
+_encoding_tables = weakref.WeakKeyDictionary()
+# Number of threads padding training batches ahead of the ones consumed by the model, so
+# that preparation of input overlaps with training.
+INPUT_WORKERS = 4
+INPUT_QUEUE_SIZE = 16
+# Keep padded training batches in memory after the first epoch, instead of padding them
+# anew on every epoch.
+CACHE_TRAINING_BATCHES = True
+# Number of samples converted to StellarGraph objects by each job of a worker process.
+CONVERSION_BATCH_SIZE = 100
+
+
 class GNNModel(TheoremProvingModel):
     """An end-to-end GNN-based model for theorem proving process."""
 
@@ -34,6 +55,7 @@ class GNNModel(TheoremProvingModel):
         self.next_theorem_model = next_theorem_model
         self.proving_termination_model = proving_termination_model
         self.nodes_encoder = nodes_encoder
+        self._inference_function = None  # Graph-compiled inference of next theorem model.
 
     def train_core(self, dataset, properties, i_train, i_val, config: TrainConfiguration):
         self.nodes_encoder = create_nodes_encoder(properties)
@@ -42,6 +64,7 @@ class GNNModel(TheoremProvingModel):
         # print("-" * 80)
         self.next_theorem_model, results = train_next_theorem_selection_model(
             dataset, self.nodes_encoder, i_train, i_val, config)
+        self._inference_function = None
 
         # print("-" * 80)
         # print(f"Training proving process termination model...")
@@ -61,17 +84,27 @@ class GNNModel(TheoremProvingModel):
         goal_graph, _ = convert_timedpropertygraph_to_stellargraph(goal, self.nodes_encoder)
 
         current_generator, goal_generator, next_generator = create_padded_generators(
-            [current_graph] * len(theorem_applications),
-            [goal_graph] * len(theorem_applications),
+            [current_graph],
+            [goal_graph],
             [convert_timedpropertygraph_to_stellargraph(t_app.actual_implication,
                                                         self.nodes_encoder, norm)[0]
              for t_app in theorem_applications]
         )
 
-        inference_generator = ProvingModelSamplesGenerator(
-            current_generator, goal_generator, next_generator)
+        # Current and goal graphs are the same for all theorem applications, so they are
+        # padded once and fed along with the padded graph of each theorem application.
+        shared_inputs, _ = ProvingModelSamplesGenerator(current_generator, goal_generator)[0]
+        next_inputs_generator = next_generator.flow(
+            list(range(len(theorem_applications))),
+            symmetric_normalization=True,
+            weighted=True,
+            shuffle=False,
+            batch_size=1
+        )
 
-        scores = self.next_theorem_model.predict(inference_generator)
+        inference_function = self._get_inference_function()
+        scores = np.concatenate([inference_function(tf.nest.flatten(shared_inputs + [x])).numpy()
+                                 for x, _ in next_inputs_generator])
 
         backend.clear_session()
 
@@ -105,6 +138,23 @@ class GNNModel(TheoremProvingModel):
         #     show_layer_names=True
         # )
 
+    def _get_inference_function(self):
+        """Returns a concrete inference function of next theorem model.
+
+        The function is traced once per loaded model, so subsequent predictions skip the
+        per-call setup of keras' predict loop. When XLA_INFERENCE is set, it is also
+        compiled with XLA.
+        """
+        if self._inference_function is None:
+            model = self.next_theorem_model
+            self._inference_function = tf.function(
+                lambda inputs: model(inputs, training=False),
+                input_signature=[[tf.TensorSpec(shape=t.shape, dtype=t.dtype)
+                                  for t in model.inputs]],
+                jit_compile=XLA_INFERENCE
+            ).get_concrete_function()
+        return self._inference_function
+
     @staticmethod
     def load(path: pathlib.Path = None):
         """Loads a GNN model.
@@ -131,12 +181,23 @@ class ProvingModelSamplesGenerator(Sequence):
     """Wrapper sequence for creating samples out of current, goal, next sequences."""
 
     def __init__(self, current_generator, goal_generator, next_generator=None,
-                 target_data=None, active_indexes=None, batch_size=1):
+                 target_data=None, active_indexes=None, batch_size=1, cache_batches=False):
+        """
+        :param cache_batches: If set to True, every batch is kept in memory once created, as
+                batches of the same index always contain the same samples.
+        """
         # If no active_indexes sequence is applied, then use all data of given generators.
         if not active_indexes:
             active_indexes = list(range(len(current_generator.graphs)))
 
-        self.targets = target_data[active_indexes] if target_data is not None else None
+        self.targets = None
+        if target_data is not None:
+            # Contiguous indexes select a view of target data, instead of a copy.
+            first = active_indexes[0]
+            if np.array_equal(active_indexes, np.arange(first, first+len(active_indexes))):
+                self.targets = target_data[first:first+len(active_indexes)]
+            else:
+                self.targets = target_data[active_indexes]
 
         self.current_data_generator = current_generator.flow(
             active_indexes,
@@ -164,10 +225,21 @@ class ProvingModelSamplesGenerator(Sequence):
         else:
             self.next_data_generator = None
 
+        self.cached_batches = {} if cache_batches else None
+
     def __len__(self):
         return self.current_data_generator.__len__()
 
     def __getitem__(self, item):
+        if self.cached_batches is not None:
+            batch = self.cached_batches.get(item)
+            if batch is None:
+                batch = self._create_batch(item)
+                self.cached_batches[item] = batch
+            return batch
+        return self._create_batch(item)
+
+    def _create_batch(self, item):
         x1 = self.current_data_generator[item]
         x2 = self.goal_data_generator[item]
         if self.next_data_generator:
@@ -182,21 +254,26 @@ def train_next_theorem_selection_model(graph_samples, nodes_encoder, i_train, i_
     # Create input generators to feed model and output data.
     current_generator, goal_generator, next_generator = \
         create_sample_generators(graph_samples, nodes_encoder, verbose=True)
-    next_theorem_labels = np.array(
-        [int(s.is_next_theorem_correct()) for s in graph_samples]).reshape((-1, 1))
+    # Labels are read directly into the float32 type of model's output.
+    next_theorem_labels = np.fromiter(
+        (s.is_next_theorem_correct() for s in graph_samples),
+        dtype="float32", count=len(graph_samples)
+    ).reshape((-1, 1))
 
     train_generator = ProvingModelSamplesGenerator(current_generator,
                                                    goal_generator,
                                                    next_generator,
                                                    target_data=next_theorem_labels,
                                                    active_indexes=i_train,
-                                                   batch_size=config.batch_size)
+                                                   batch_size=config.batch_size,
+                                                   cache_batches=CACHE_TRAINING_BATCHES)
     test_generator = ProvingModelSamplesGenerator(current_generator,
                                                   goal_generator,
                                                   next_generator,
                                                   target_data=next_theorem_labels,
                                                   active_indexes=i_test,
-                                                  batch_size=1)
+                                                  batch_size=1,
+                                                  cache_batches=CACHE_TRAINING_BATCHES)
 
     # Train model.
     model = create_gnn_model(current_generator, goal_generator, next_generator)
@@ -222,7 +299,9 @@ def train_next_theorem_selection_model(graph_samples, nodes_encoder, i_train, i_
         epochs=config.epochs,
         verbose=1,
         validation_data=test_generator,
-        callbacks=[model_checkpoint_cb, best_model_cb]
+        callbacks=[model_checkpoint_cb, best_model_cb],
+        workers=INPUT_WORKERS,
+        max_queue_size=INPUT_QUEUE_SIZE
     )
     best_epoch = np.argmax(history.history["loss"])
     results = TrainingResults()
@@ -324,12 +403,16 @@ def create_gnn_model(current_generator: PaddedGraphGenerator, goal_generator: Pa
     out = Concatenate()([current_out, goal_out, next_out])
     out = Dense(units=64, activation="relu")(out)
     out = Dense(units=32, activation="relu")(out)
-    out = Dense(units=1, activation="sigmoid")(out)
+    # Output is always computed in float32, so the sigmoid and the loss remain stable when
+    # the mixed precision policy is enabled (LOVPY_MIXED_PRECISION).
+    out = Dense(units=1, activation="sigmoid", dtype="float32")(out)
 
     model = Model(inputs=[current_input, goal_input, next_input], outputs=out)
+    # Output stays a probability, as expected by metrics and by consumers of scores. Keras
+    # computes cross-entropy directly out of the logits of the final sigmoid.
     model.compile(
         optimizer=Adam(learning_rate=0.001),
-        loss=MeanSquaredError(),
+        loss=BinaryCrossentropy(),
         metrics=["acc", AUC(name="auc")]
     )
     return model
@@ -389,37 +472,33 @@ def create_graph_embedding_branch(generator: PaddedGraphGenerator, dgcnn_layer_s
 
 
 def create_sample_generators(graph_samples: list, encoder: OneHotEncoder, verbose=False):
+    # Conversion is dominated by Python code that holds the GIL, so samples are converted
+    # in batches split across all CPU cores, instead of threads.
+    batches = [graph_samples[i:i+CONVERSION_BATCH_SIZE]
+               for i in range(0, len(graph_samples), CONVERSION_BATCH_SIZE)]
+    n_jobs = max(1, min(os.cpu_count() or 1, len(batches)))
+    converted_batches = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_convert_samples)(batch, encoder) for batch in batches)
+
     current_graphs = []
     goal_graphs = []
     next_graphs = []
-    for s in graph_samples:
-        current_graph, norm = convert_timedpropertygraph_to_stellargraph(s.current_graph, encoder)
-        goal_graph, _ = convert_timedpropertygraph_to_stellargraph(s.goal, encoder)
-        next_graph, _ = convert_timedpropertygraph_to_stellargraph(s.next_theorem, encoder, norm)
-        current_graphs.append(current_graph)
-        goal_graphs.append(goal_graph)
-        next_graphs.append(next_graph)
+    for batch_current_graphs, batch_goal_graphs, batch_next_graphs in converted_batches:
+        current_graphs.extend(batch_current_graphs)
+        goal_graphs.extend(batch_goal_graphs)
+        next_graphs.extend(batch_next_graphs)
 
     # Print statistical info about nodes and edges number in three types of graphs.
     if verbose:
-        current_summary = pd.DataFrame(
-            [(g.number_of_nodes(), g.number_of_edges) for g in current_graphs],
+        sizes = pd.DataFrame(
+            [(g.number_of_nodes(), g.number_of_edges()) if g else (0, 0)
+             for g in itertools.chain(current_graphs, goal_graphs, next_graphs)],
             columns=["nodes", "edges"]
         )
-        print("Summary of current graphs:")
-        print(current_summary.describe().round(1))
-        goal_summary = pd.DataFrame(
-            [(g.number_of_nodes(), g.number_of_edges) for g in goal_graphs],
-            columns=["nodes", "edges"]
-        )
-        print("Summary of goal graphs:")
-        print(goal_summary.describe().round(1))
-        next_summary = pd.DataFrame(
-            [(g.number_of_nodes(), g.number_of_edges) if g else (0, 0) for g in next_graphs],
-            columns=["nodes", "edges"]
-        )
-        print("Summary of next theorem graphs:")
-        print(next_summary.describe().round(1))
+        samples_num = len(graph_samples)
+        for i, graphs_type in enumerate(["current", "goal", "next theorem"]):
+            print(f"Summary of {graphs_type} graphs:")
+            print(sizes.iloc[i*samples_num:(i+1)*samples_num].describe().round(1))
 
     return create_padded_generators(current_graphs, goal_graphs, next_graphs)
 
@@ -444,37 +523,52 @@ def convert_timedpropertygraph_to_stellargraph(graph: TimedPropertyGraph, encode
             PaddedGraphGenerator.
     """
     nx_graph = graph.graph
+    nodes = list(nx_graph.nodes)
+    node_index = {n: i for i, n in enumerate(nodes)}
+
+    # Timestamps of all edges are read in a single pass, along with the index of their source.
+    edges = list(nx_graph.edges(data=TIMESTAMP_PROPERTY_NAME))
+    sources = np.fromiter((node_index[e[0]] for e in edges), dtype=np.int64, count=len(edges))
+    time_values = np.fromiter((_get_timestamp_numerical_value(e[2]) for e in edges),
+                              dtype="float32", count=len(edges))
 
     if not normalization_value:
-        # Find maximum timestamp value to be used for normalization.
-        time_values = []
-        for e in nx_graph.edges:
-            timestamp = nx_graph[e[0]][e[1]][e[2]][TIMESTAMP_PROPERTY_NAME]
-            time_values.append(_get_timestamp_numerical_value(timestamp))
-        time_values = np.array(time_values, dtype="float32")
-        normalization_value = max(time_values)
+        # Use maximum timestamp value for normalization.
+        normalization_value = time_values.max()
+    if normalization_value > 1.:
+        time_values = time_values / normalization_value
 
     # Use 1-hot encoded node labels, along with normalized min and max of outgoing edges as
-    # features of the nodes.
-    nodes = list(nx_graph.nodes)
-    node_features = []
-    for n in nodes:
-        feature = encoder.transform(
-            np.array([graph.get_node_label(n)]).reshape(-1, 1)).toarray().flatten()
-
-        out_timestamps = [_get_timestamp_numerical_value(e[3])
-                          for e in nx_graph.edges(n, data=TIMESTAMP_PROPERTY_NAME, keys=True)]
-        if out_timestamps:
-            out_timestamps = np.array(out_timestamps, dtype="float32")
-            if normalization_value > 1.:
-                out_timestamps = out_timestamps / normalization_value
-            feature = np.append(feature, [min(out_timestamps), max(out_timestamps)])
-        else:
-            feature = np.append(feature, [0., 0.])
+    # features of the nodes. Nodes without outgoing edges get zeros for both.
+    out_min = np.full(len(nodes), np.inf, dtype="float32")
+    out_max = np.full(len(nodes), -np.inf, dtype="float32")
+    np.minimum.at(out_min, sources, time_values)
+    np.maximum.at(out_max, sources, time_values)
+    no_out_edges = np.ones(len(nodes), dtype=bool)
+    no_out_edges[sources] = False
+    out_min[no_out_edges] = 0.
+    out_max[no_out_edges] = 0.
 
-        node_features.append(feature)
-
-    sg_graph = StellarGraph.from_networkx(nx_graph, node_features=zip(nodes, node_features))
+    node_features = []
+    if nodes:
+        # Features are built in float32, which StellarGraph stores them as, so they are not
+        # converted once more.
+        encoded_labels = _encode_labels(encoder, [graph.get_node_label(n) for n in nodes])
+        node_features = np.empty((len(nodes), encoded_labels.shape[1] + 2), dtype="float32")
+        node_features[:, :-2] = encoded_labels
+        node_features[:, -2] = out_min
+        node_features[:, -1] = out_max
+
+    # Graph is built out of frames of the already collected nodes and edges, so networkx
+    # graph is not traversed again, as in StellarGraph.from_networkx(). All edges weight 1.
+    sg_graph = StellarDiGraph(
+        nodes=pd.DataFrame(node_features, index=nodes),
+        edges=pd.DataFrame({
+            "source": [e[0] for e in edges],
+            "target": [e[1] for e in edges],
+            "weight": np.ones(len(edges), dtype="float32")
+        })
+    )
     return sg_graph, normalization_value
 
 
@@ -485,11 +579,56 @@ def get_nodes_labels(properties):
 
     :return: A set containing all node labels used in given sequence of property graphs.
     """
-    labels = set()
-    for p in properties:
-        for n in p.graph.nodes:
-            labels.add(p.get_node_label(n))
-    return labels
+    return {p.get_node_label(n) for p in properties for n in p.graph.nodes}
+
+
+def _convert_samples(graph_samples, encoder: OneHotEncoder):
+    """Converts current, goal and next theorem graphs of samples to StellarGraph objects.
+
+    :return: A tuple of three lists, containing the converted current, goal and next theorem
+            graphs respectively, in the order of samples.
+    """
+    current_graphs = []
+    goal_graphs = []
+    next_graphs = []
+    for s in graph_samples:
+        current_graph, norm = convert_timedpropertygraph_to_stellargraph(s.current_graph, encoder)
+        goal_graph, _ = convert_timedpropertygraph_to_stellargraph(s.goal, encoder)
+        next_graph, _ = convert_timedpropertygraph_to_stellargraph(s.next_theorem, encoder, norm)
+        current_graphs.append(current_graph)
+        goal_graphs.append(goal_graph)
+        next_graphs.append(next_graph)
+    return current_graphs, goal_graphs, next_graphs
+
+
+def _encode_labels(encoder: OneHotEncoder, labels):
+    """Returns the one-hot encoding of given labels, the same as encoder.transform().
+
+    Rows are looked up in a table of the encodings of all known labels, so sklearn's
+    transformation is skipped. Unknown labels are encoded as zeros, when encoder ignores
+    them.
+    """
+    if encoder.handle_unknown != "ignore":
+        return encoder.transform(np.array(labels).reshape(-1, 1)).toarray()
+    table, label_rows = _get_encoding_table(encoder)
+    unknown_row = len(table) - 1
+    return table[[label_rows.get(label, unknown_row) for label in labels]]
+
+
+def _get_encoding_table(encoder: OneHotEncoder):
+    """Returns the encodings of all labels known to encoder, along with their row indexes.
+
+    Table is built once per fitted encoder and ends with an all zeros row.
+    """
+    categories = encoder.categories_
+    cached = _encoding_tables.get(encoder)
+    if cached is None or cached[0] is not categories:  # Encoder not seen or fitted again.
+        known_labels = categories[0]
+        table = encoder.transform(known_labels.reshape(-1, 1)).toarray()
+        table = np.concatenate([table, np.zeros((1, table.shape[1]), dtype=table.dtype)])
+        cached = (categories, table, {label: i for i, label in enumerate(known_labels)})
+        _encoding_tables[encoder] = cached
+    return cached[1], cached[2]
 
 
 def _get_timestamp_numerical_value(timestamp):
@@ -1,15 +1,13 @@
-# Fix for pygraphviz issue not properly releasing resources after calling graphviz binaries.
-# Exporting thousands of graphs in a single interpreter session will still crash.
-import win32file
-win32file._setmaxstdio(8192)
-
 import pickle
 import random
+import sys
 from collections import Counter
 
-from matplotlib import pyplot as plt
-from matplotlib import image as mpimage
-from tensorflow.keras.models import load_model
+# Fix for pygraphviz issue not properly releasing resources after calling graphviz binaries.
+# Exporting thousands of graphs in a single interpreter session will still crash.
+if sys.platform == "win32":
+    import win32file
+    win32file._setmaxstdio(8192)
 
 
 # Paths about simple NN model.
@@ -33,6 +31,9 @@ graph_model_train_output_dir_path = None
 dgcnn_selection_process_export_path = None
 dgcnn_selection_processes_exported = Counter()
 
+# Last loaded gnn models, along with the version of the files they were loaded from.
+_loaded_gnn_models = None
+
 
 def save_gnn_models(selection_model, termination_model, encoder,
                     selection_model_path=None,
@@ -44,14 +45,24 @@ def save_gnn_models(selection_model, termination_model, encoder,
         termination_model_path = graph_termination_model_path
         encoder_path = graph_encoder_path
 
+    global _loaded_gnn_models
+
     selection_model.save(selection_model_path)
     # termination_model.save(termination_model_path)
     with encoder_path.open("wb") as f:
         pickle.dump(encoder, f)
+    _loaded_gnn_models = None
 
 
 def load_gnn_models():
-    """Loads gnn models along with nodes encoder from disk."""
+    """Loads gnn models along with nodes encoder from disk.
+
+    Loaded models are reused by subsequent calls, e.g. when switching between graph based
+    theorem selectors, as long as their files are not saved again.
+    """
+    global _loaded_gnn_models
+    from tensorflow.keras.models import load_model
+
     selection_model = None
     termination_model = None
     encoder = None
@@ -59,10 +70,17 @@ def load_gnn_models():
     if (graph_selection_model_path.exists()
             # and graph_termination_model_path.exists()
             and graph_encoder_path.exists()):
+        # Encoder is rewritten every time models are saved, so it versions all files.
+        files_version = (graph_selection_model_path, graph_encoder_path,
+                         graph_encoder_path.stat().st_mtime_ns)
+        if _loaded_gnn_models is not None and _loaded_gnn_models[0] == files_version:
+            return _loaded_gnn_models[1]
+
         selection_model = load_model(graph_selection_model_path)
         # termination_model = load_model(graph_termination_model_path)
         with graph_encoder_path.open("rb") as f:
             encoder = pickle.load(f)
+        _loaded_gnn_models = (files_version, (selection_model, termination_model, encoder))
 
     return selection_model, termination_model, encoder
 
@@ -153,6 +171,10 @@ def visualize_three_graphs(current_graph, goal_graph, next_graph,
             theorem is marked with a different color in current graph. If assumption is not
             contained in current graph, then nothing happens.
     """
+    # Matplotlib is only imported when graphs are actually visualized.
+    from matplotlib import pyplot as plt
+    from matplotlib import image as mpimage
+
     if visualize_next_assumption_in_current:
         assumption, _ = next_graph.get_top_level_implication_subgraphs()
         current_graph = current_graph.get_copy()
@@ -2,13 +2,6 @@ import random
 import json
 
 import numpy as np
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.utils import plot_model
-from tensorflow.keras.metrics import AUC
-from tensorflow.keras.losses import MeanSquaredError
-from tensorflow.keras.callbacks import ModelCheckpoint
-from tensorflow.keras import backend
 
 import lovpy.logic.properties
 from lovpy.graphs.timed_property_graph import TimedPropertyGraph
@@ -30,6 +23,9 @@ class SimpleModel(TheoremProvingModel):
         self.predicates_map = predicates_map
 
     def train_core(self, dataset, properties, i_train, i_val, config: TrainConfiguration):
+        from tensorflow.keras.models import load_model
+        from tensorflow.keras.callbacks import ModelCheckpoint
+
         data, outputs, self.predicates_map = create_training_data(properties, dataset)
 
         train_data = data[i_train]
@@ -78,24 +74,25 @@ class SimpleModel(TheoremProvingModel):
                 current: TimedPropertyGraph,
                 theorem_applications: list,
                 goal: TimedPropertyGraph):
-        scores = []
+        from tensorflow.keras import backend
 
-        for application in theorem_applications:
-            data = convert_state_to_matrix(
-                current, application.implication_graph, goal, self.predicates_map)
+        # All theorem applications are scored by a single call to the model.
+        data = convert_theorem_applications_to_data(
+            current, theorem_applications, goal, self.predicates_map)
 
-            score = self.model(data)[0]
-            scores.append(score)
+        scores = self.model(data, training=False).numpy()
 
         backend.clear_session()
 
-        return np.array(scores)
+        return scores
 
     def save(self):
         self.model.save(io.main_model_path)
         json.dump(self.predicates_map.map, io.predicates_map_path.open('w'))
 
     def plot(self, folder):
+        from tensorflow.keras.utils import plot_model
+
         plot_model(
             self.model,
             to_file=folder / f"{self.name}.png",
@@ -105,6 +102,8 @@ class SimpleModel(TheoremProvingModel):
 
     @staticmethod
     def load(path=None):
+        from tensorflow.keras.models import load_model
+
         # TODO: Implement loading from different paths.
         mlp = load_model(io.main_model_path)
         predicates_map = PredicatesMap(pred_map=json.load(io.predicates_map_path.open('r')))
@@ -168,8 +167,18 @@ class PredicatesMap:
         return pred_name, is_negated
 
 
+def get_input_dim(predicates_map):
+    """Returns the length of the flat input rows of the MLP model."""
+    return 3 * PREDICATES_NUM * (len(predicates_map) + 1)
+
+
 def create_dense_model(predicates_map):
-    dim = 3 * PREDICATES_NUM * (len(predicates_map) + 1)
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.metrics import AUC
+    from tensorflow.keras.losses import MeanSquaredError
+
+    dim = get_input_dim(predicates_map)
     model = Sequential()
     model.add(Dense(dim, input_dim=dim, activation="relu"))
     model.add(Dense(dim, activation="relu"))
@@ -182,7 +191,7 @@ def create_dense_model(predicates_map):
 def create_training_data(properties, samples):
     predicates_map = PredicatesMap(properties)
 
-    data = np.zeros((len(samples), PREDICATES_NUM*3*(len(predicates_map)+1)))
+    data = np.zeros((len(samples), get_input_dim(predicates_map)))
     outputs = np.zeros(len(samples))
 
     for i in range(len(samples)):
@@ -233,6 +242,27 @@ def convert_property_graph_to_matrix(property_graph: TimedPropertyGraph, predica
     return data.flatten()
 
 
+def convert_theorem_applications_to_data(current_graph, theorem_applications, goal_property,
+                                         predicates_map):
+    """Converts the states of all given theorem applications to a batch of inference data.
+
+    :return: A 2-D array with one flat row per theorem application, as expected by the model
+            built by create_dense_model().
+    """
+    # Current and goal graphs are only converted once.
+    current_table = convert_property_graph_to_matrix(current_graph, predicates_map)
+    goal_table = convert_property_graph_to_matrix(goal_property, predicates_map)
+    data = np.stack([
+        np.concatenate((
+            current_table,
+            convert_property_graph_to_matrix(application.implication_graph, predicates_map),
+            goal_table
+        ), axis=0)
+        for application in theorem_applications
+    ])
+    return data.reshape((len(theorem_applications), -1))
+
+
 def convert_state_to_matrix(current_graph, next_theorem, goal_property, predicates_map):
     """Converts a triple defining the current state of theorem proving to inference data."""
     current_table = convert_property_graph_to_matrix(current_graph, predicates_map)
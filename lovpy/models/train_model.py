@@ -11,7 +11,7 @@ from .train_config import TrainConfiguration
 from .theorem_proving_model import TheoremProvingModel
 from .gnn_model import GNNModel
 from .simple_model import SimpleModel
-from .dataset_generator import DatasetGenerator
+from .dataset_generator import DatasetGenerator, generate_samples_in_parallel
 from .io import export_generated_samples, export_theorems_and_properties
 from .neural_theorem_selector import NeuralNextTheoremSelector
 
@@ -173,21 +173,17 @@ def generate_gnn_config():
 
 
 def generate_dataset(properties, config: TrainConfiguration):
-    generator = DatasetGenerator(properties, config.max_depth, config.dataset_size,
-                                 random_expansion_probability=config.random_expansion_probability,
-                                 negative_samples_percentage=config.negative_samples_percentage)
-
     if config.export_properties:
+        generator = DatasetGenerator(properties, config.max_depth, config.dataset_size)
         print(f"\tExporting theorems and properties...")
         export_theorems_and_properties(generator.theorems, generator.valid_properties_to_prove)
 
-    print(f"\tGenerating {config.dataset_size} samples...")
-    graph_samples = []
-    print(f"\t\tGenerated 0/{config.dataset_size}...", end="\r")
-    for i, s in enumerate(generator):
-        if ((i+1) % 10) == 0 or (i+1) == config.dataset_size:
-            print(f"\t\tGenerated {i+1}/{config.dataset_size}...", end="\r")
-        graph_samples.append(s)
+    graph_samples = generate_samples_in_parallel(
+        properties, config.dataset_size, config.max_depth,
+        random_expansion_probability=config.random_expansion_probability,
+        negative_samples_percentage=config.negative_samples_percentage,
+        verbose=True
+    )
 
     # for i, sample in enumerate(graph_samples[:5]):
     #     sample.visualize(f"Sample #{i+1}")
@@ -4,6 +4,9 @@ from lovpy.graphs.timed_property_graph import *
 
 
 predicates_to_monitor = set()  # Predicates the monitor should add to execution graphs.
+# Monitored status of predicates checked so far, keyed by their type and arguments. It is
+# cleared whenever a new predicate is added to monitored ones.
+_monitored_status_cache = {}
 
 
 class MonitoredPredicate:
@@ -93,8 +96,23 @@ def add_predicate_to_monitor(monitored_predicate: MonitoredPredicate):
     """Adds a predicate to the list of actively monitored predicates."""
     assert isinstance(monitored_predicate, MonitoredPredicate)
     predicates_to_monitor.add(monitored_predicate)
+    _monitored_status_cache.clear()
 
 
 def is_predicate_monitored(monitored_predicate: MonitoredPredicate):
     """Checks whether a predicate is currently monitored."""
     return monitored_predicate in predicates_to_monitor
+
+
+def is_predicate_type_monitored(predicate_type, *args):
+    """Checks whether the predicate of given type and arguments is currently monitored.
+
+    Result is the same as is_predicate_monitored(predicate_type(*args)), though the predicate
+    object is only created upon the first check of each predicate.
+    """
+    key = (predicate_type, args)
+    monitored = _monitored_status_cache.get(key)
+    if monitored is None:
+        monitored = is_predicate_monitored(predicate_type(*args))
+        _monitored_status_cache[key] = monitored
+    return monitored
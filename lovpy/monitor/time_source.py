@@ -27,6 +27,22 @@ class TimeSource:
         new_timesource._current_time = self._current_time
         return new_timesource
 
+    def __reduce__(self):
+        # Shared time sources should map to the shared instance of the unpickling process.
+        if self is global_time_source:
+            return get_global_time_source, ()
+        if self is zero_locked_time_source:
+            return get_zero_locked_timesource, ()
+        return super().__reduce__()
+
+    def __getstate__(self):
+        # Locks cannot be pickled, so a new one is created upon unpickling.
+        return {"_current_time": self._current_time}
+
+    def __setstate__(self, state):
+        self._current_time = state["_current_time"]
+        self._lock = threading.Lock()
+
     # def pause(self):
     #     self._lock.acquire()
     #
@@ -1,11 +1,15 @@
+import inspect
+import sys
 import threading
 import types
 import warnings
-import inspect
+from itertools import chain, count
 
+import lovpy.config as config
 from lovpy.exceptions import PropertyNotHoldsException
 import lovpy.logic.properties as lovpy_properties
 from lovpy.logic import prover
+from lovpy.logic.prover import prove_property
 from .monitored_predicate import *
 from .time_source import global_stamp_and_increment
 from ..graphs.dynamic_temporal_graph import EvaluatedDynamicGraph
@@ -14,7 +18,7 @@ MONITOR_ONLY_MONITORED_PREDICATES = True
 DISABLE_MONITORING_WHEN_PROPERTY_EXCEPTION_RAISED = True
 KEEP_TRACK_OF_LAST_VERIFIED_FRAME = True
 
-_SPECIAL_NAMES = [
+_SPECIAL_NAMES = frozenset([
     '__abs__', '__add__', '__and__', '__call__', '__cmp__', '__coerce__',
     '__contains__', '__delitem__', '__delslice__', '__div__', '__divmod__',
     '__eq__', '__floordiv__', '__ge__', '__getitem__',
@@ -31,8 +35,12 @@ _SPECIAL_NAMES = [
     '__rmul__', '__ror__', '__rpow__', '__rrshift__', '__rshift__', '__rsub__',
     '__rtruediv__', '__rxor__', '__setitem__', '__setslice__', '__sub__',
     '__truediv__', '__xor__', '__next__',  # '__repr__',  # comment to not create string errors
-]
-_PRIMITIVE_CONVERTERS = {'__float__', '__int__', '__bool__', '__str__', '__hash__', '__len__'}
+])
+_PRIMITIVE_CONVERTERS = frozenset(
+    ['__float__', '__int__', '__bool__', '__str__', '__hash__', '__len__'])
+
+# Ids of instantiated LogipyPrimitive objects, generated atomically to be thread safe.
+_next_lovpy_id = count().__next__
 
 _property_exception_raised = False
 
@@ -59,6 +67,10 @@ class LogipyMethod:
 
     def __call__(self, globs, locs, *args, **kwargs):
         """Wrapper method for monitoring the calls on a callable object."""
+        if not self.__involves_primitives(args, kwargs):
+            # Neither caller nor arguments are monitored, so only returned value may be.
+            return self.__monitor_returned_by__(args, kwargs, None, globs, locs)
+
         # A graph to include the state of caller, the state of args and the new steps.
         total_execution_graph = TimedPropertyGraph()
 
@@ -67,6 +79,18 @@ class LogipyMethod:
                                                            globs, locs)
         return self.__monitor_returned_by__(args, kwargs, total_execution_graph, globs, locs)
 
+    def __involves_primitives(self, args, kwargs):
+        """Checks whether parent object or any of the arguments is a LogipyPrimitive."""
+        if isinstance(self.__parent_object, LogipyPrimitive):
+            return True
+        for arg in args:
+            if isinstance(arg, LogipyPrimitive):
+                return True
+        for arg in kwargs.values():
+            if isinstance(arg, LogipyPrimitive):
+                return True
+        return False
+
     def __get__(self, instance, cls):
         return types.MethodType(self, instance) if instance else self
 
@@ -74,9 +98,10 @@ class LogipyMethod:
         """Monitor "call" predicate on parent object."""
         if self.__parent_object is not None and isinstance(self.__parent_object, LogipyPrimitive):
             current_timestamp = Timestamp(global_stamp_and_increment())
-            call_predicate = Call(self.__method.__name__)
-            if is_predicate_monitored(call_predicate) or not MONITOR_ONLY_MONITORED_PREDICATES:
-                call_graph = call_predicate.convert_to_graph()
+            method_name = self.__method.__name__
+            if (is_predicate_type_monitored(Call, method_name)
+                    or not MONITOR_ONLY_MONITORED_PREDICATES):
+                call_graph = Call(method_name).convert_to_graph()
                 call_graph.set_timestamp(current_timestamp)
 
                 # Update the state of parent object and verify it.
@@ -91,16 +116,14 @@ class LogipyMethod:
 
     def __monitor_called_by__(self, args, kwargs, total_execution_graph, globs, locs):
         """Monitor "called by" predicate on arguments passed to current call."""
-        args_list = list(args)
-        args_list.extend(kwargs.values())
-        for arg in args_list:
+        for arg in chain(args, kwargs.values()):
             if isinstance(arg, LogipyPrimitive):
                 current_timestamp = Timestamp(global_stamp_and_increment())
-                called_by_predicate = CalledBy(self.__method.__name__)
-                if (is_predicate_monitored(called_by_predicate)
+                method_name = self.__method.__name__
+                if (is_predicate_type_monitored(CalledBy, method_name)
                         or not MONITOR_ONLY_MONITORED_PREDICATES):
                     # Add the called by predicate to the execution graphs of all arguments.
-                    called_by_graph = called_by_predicate.convert_to_graph()
+                    called_by_graph = CalledBy(method_name).convert_to_graph()
                     called_by_graph.set_timestamp(current_timestamp)
 
                     arg.__get_lock__().acquire()
@@ -115,32 +138,23 @@ class LogipyMethod:
     def __monitor_returned_by__(self, args, kwargs, total_execution_graph, globs, locs):
         global _property_exception_raised
 
-        # TODO: FIND THE BEST WAY TO DO THE FOLLOWING
+        # Errors of wrapped callable are propagated as is, without retrying the call with
+        # unwrapped arguments.
         try:
             ret = self.__method(*args, **kwargs)
-        except Exception as err:
-            if not isinstance(err, prover.PropertyNotHoldsException):
-                # args = [arg.get_lovpy_value() if isinstance(arg, LogipyPrimitive) else arg for arg
-                #         in args]
-                # kwargs = {key: arg.get_lovpy_value() if isinstance(arg, LogipyPrimitive) else arg
-                #           for key, arg in kwargs.items()}
-                # ret = self.__method(*args, **kwargs)
-                # lovpy_warning(
-                #     "A method " + self.__method.__name__ +
-                #     " was called a second time at least once by casting away LogipyPrimitive " +
-                #     "due to invoking the error: " + str(err))
-                raise err
-            else:
-                _property_exception_raised = True
-                raise err
+        except PropertyNotHoldsException:
+            _property_exception_raised = True
+            raise
 
         # TODO: Find a better way to handle predicates from arguments and caller objects.
-        ret = LogipyPrimitive(ret, total_execution_graph)
+        # Total execution graph is not used anywhere else, so it is not copied.
+        ret = LogipyPrimitive(ret, total_execution_graph, take_previous_graph=True)
 
-        returned_by_predicate = ReturnedBy(self.__method.__name__)
+        method_name = self.__method.__name__
         current_timestamp = Timestamp(global_stamp_and_increment())
-        if is_predicate_monitored(returned_by_predicate) or not MONITOR_ONLY_MONITORED_PREDICATES:
-            returned_by_graph = returned_by_predicate.convert_to_graph()
+        if (is_predicate_type_monitored(ReturnedBy, method_name)
+                or not MONITOR_ONLY_MONITORED_PREDICATES):
+            returned_by_graph = ReturnedBy(method_name).convert_to_graph()
             returned_by_graph.set_timestamp(current_timestamp)
 
             ret.__get_lock__().acquire()
@@ -154,35 +168,49 @@ class LogipyMethod:
 class LogipyPrimitive:
     """Wrapper for every python object, in order to be monitored by lovpy."""
 
-    __lovpy_id_count = 0  # Counter for each instantiated LogipyPrimitive so far.
-
-    def __init__(self, value, previous_execution_graph=None):
+    # Wrapper's own state is kept in slots. A dict is still allocated upon the first
+    # assignment of any other attribute by the monitored program.
+    __slots__ = ("__lovpy_value", "__execution_graph", "__timestamp", "__lock",
+                 "__properties_last_proved_frame", "__lovpy_id", "__dict__", "__weakref__")
+
+    def __init__(self, value, previous_execution_graph=None, take_previous_graph=False):
+        """
+        :param value: The object to be wrapped.
+        :param previous_execution_graph: An execution graph to precede the one of value.
+        :param take_previous_graph: When True, previous execution graph is extended in place
+                instead of being copied, so the caller should not use it afterwards.
+        """
         if isinstance(value, LogipyPrimitive):
-            # If given value is already a LogipyPrimitive, copy its execution graph.
+            # If given value is already a LogipyPrimitive, its execution graph is inherited.
             self.__lovpy_value = value.__lovpy_value
-            self.__execution_graph = value.get_execution_graph().get_copy()
+            value_graph = value.get_execution_graph()
             self.__timestamp = value.__timestamp
         else:
-            # If given value is not a LogipyPrimitive, instantiate a new set of properties.
+            # If given value is not a LogipyPrimitive, it has no properties so far.
             self.__lovpy_value = value
-            self.__execution_graph = TimedPropertyGraph()
+            value_graph = None
             self.__timestamp = global_stamp_and_increment()
 
         self.__lock = threading.Lock()  # Lock for performing thread-safe state modifications.
 
+        # Merge previous and value's graphs into a single new graph, created by copying only
+        # one of them. When there is no graph to inherit, a new set of properties is created.
         if previous_execution_graph is not None:
-            previous_copy = previous_execution_graph.get_copy()
-            previous_copy.logical_and(self.__execution_graph)
-            self.__execution_graph = previous_copy
+            if not take_previous_graph:
+                previous_execution_graph = previous_execution_graph.get_copy()
+            if value_graph is not None:
+                previous_execution_graph.logical_and(value_graph)
+            self.__execution_graph = previous_execution_graph
+        elif value_graph is not None:
+            self.__execution_graph = value_graph.get_copy()
+        else:
+            self.__execution_graph = TimedPropertyGraph()
 
-        # Initialize a mapping between all properties to prove and the last frame they found
-        # to hold.
-        self.__properties_last_proved_frame = dict.fromkeys(
-            [(p for p in group.properties) for group in lovpy_properties.get_global_rule_sets()]
-        )
+        # Mapping between properties to prove and the last frame they found to hold. Properties
+        # never proved so far are missing.
+        self.__properties_last_proved_frame = {}
 
-        self.__lovpy_id = str(LogipyPrimitive.__lovpy_id_count)
-        LogipyPrimitive.__lovpy_id_count += 1  # TODO: Make it thread safe.
+        self.__lovpy_id = _next_lovpy_id()
 
     def get_lovpy_id(self):
         return self.__lovpy_id
@@ -206,20 +234,19 @@ class LogipyPrimitive:
         self.__properties_last_proved_frame[prop] = frame
 
     def __getattr__(self, method_name):
-        # TODO: Rewrite function with a single exit point.
         # Delegate attribute lookup from wrapper to the wrapped object.
-        if hasattr(self.__lovpy_value, method_name):
-            if _is_callable(getattr(self.__lovpy_value, method_name)):
-                # Wrap callable attributes into a LogipyMethod wrapper.
-                return LogipyMethod(getattr(self.__lovpy_value, method_name), self)
-            else:
-                # Wrap non-callables into a LogipyPrimitive wrapper.
-                value = getattr(self.__lovpy_value, method_name)
-                if isinstance(value, LogipyPrimitive):
-                    return value
-                return LogipyPrimitive(value, self.__execution_graph)
-        else:
-            raise AttributeError()
+        try:
+            value = getattr(self.__lovpy_value, method_name)
+        except AttributeError:
+            raise AttributeError(method_name) from None
+
+        if _is_callable(value):
+            # Wrap callable attributes into a LogipyMethod wrapper.
+            value = LogipyMethod(value, self)
+        elif not isinstance(value, LogipyPrimitive):
+            # Wrap non-callables into a LogipyPrimitive wrapper.
+            value = LogipyPrimitive(value, self.__execution_graph)
+        return value
 
         # def method(self, *args, **kw):
         #     return LogipyPrimitive(getattr(self.__lovpy_value, method_name)(*args, **kw))
@@ -289,20 +316,29 @@ def _verify_object_when_no_exception(o: LogipyPrimitive, globs, locs):
 
 
 def _verify_object(o: LogipyPrimitive, globs, locs):
-    _prove_negative_properties(o, globs, locs)
+    # Properties may be found not to hold from now on, so lovpy's exception handler is needed.
+    config.ensure_runtime_registered()
+
+    # Theorems of each rule set are evaluated once, for proving both negative and
+    # positive properties.
+    rule_sets = lovpy_properties.get_global_rule_sets()
+    rule_sets_theorems = [rule_set.get_evaluated_theorems(globs, locs) for rule_set in rule_sets]
+
+    _prove_negative_properties(o, rule_sets, rule_sets_theorems, globs, locs)
     if KEEP_TRACK_OF_LAST_VERIFIED_FRAME:
-        _prove_positive_properties(o, globs, locs)
+        _prove_positive_properties(o, rule_sets, rule_sets_theorems, globs, locs)
 
 
-def _prove_negative_properties(o: LogipyPrimitive, globs, locs):
-    for rule_set in lovpy_properties.get_global_rule_sets():
-        # First, evaluate dynamic properties and theorems.
+def _prove_negative_properties(o: LogipyPrimitive, rule_sets, rule_sets_theorems, globs, locs):
+    for rule_set, theorems in zip(rule_sets, rule_sets_theorems):
+        # First, evaluate dynamic properties.
         neg_properties = rule_set.get_evaluated_properties(globs, locs, negatives=True)
-        theorems = rule_set.get_evaluated_theorems(globs, locs)
 
         for p in neg_properties:
-            proved, theorems_applied, intermediate_graphs = prover.prove_property(
-                o.get_execution_graph(), p, theorems)
+            # Intermediate graphs are only needed for visualizing a failure.
+            proved, theorems_applied, intermediate_graphs = prove_property(
+                o.get_execution_graph(), p, theorems,
+                keep_intermediate_graphs=prover.full_visualization_enabled)
 
             if proved:
                 if prover.full_visualization_enabled:
@@ -315,27 +351,51 @@ def _prove_negative_properties(o: LogipyPrimitive, globs, locs):
                 )
 
 
-def _prove_positive_properties(o: LogipyPrimitive, globs, locs):
-    for rule_set in lovpy_properties.get_global_rule_sets():
-        # First, evaluate dynamic properties and theorems.
+def _prove_positive_properties(o: LogipyPrimitive, rule_sets, rule_sets_theorems, globs, locs):
+    for rule_set, theorems in zip(rule_sets, rule_sets_theorems):
+        # First, evaluate dynamic properties.
         properties = rule_set.get_evaluated_properties(globs, locs)
-        theorems = rule_set.get_evaluated_theorems(globs, locs)
 
         for p in properties:
-            proved, _, _ = prover.prove_property(
+            proved, _, _ = prove_property(
                 o.get_execution_graph(),
                 p,
-                theorems
+                theorems,
+                keep_intermediate_graphs=False
             )
             if proved:
                 o.__update_property_last_proved_frame__(
-                    p.dynamic_graph if isinstance(p, EvaluatedDynamicGraph) else p, inspect.stack())
+                    p.dynamic_graph if isinstance(p, EvaluatedDynamicGraph) else p,
+                    _get_stack_frames())
+
+
+def _get_stack_frames():
+    """Returns the locations of all frames of caller's stack, innermost first.
+
+    It replaces inspect.stack(), which looks up the source files and lines of every frame,
+    while only frames' locations are needed to report the last line a property held. Returned
+    records are inspect.FrameInfo ones, with None in place of frame, code_context and index.
+    """
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        frames.append(inspect.FrameInfo(None, code.co_filename, frame.f_lineno, code.co_name,
+                                        None, None))
+        frame = frame.f_back
+    return frames
+
+
+def _make_converter_method(method_name):
+    """Creates a special method that directly converts the wrapped value, unmonitored."""
+    def method(self, *args, **kwargs):
+        return getattr(self.get_lovpy_value(), method_name)(*args, **kwargs)
+    return method
 
 
-def _make_primitive_method(method_name):
+def _make_wrapped_method(method_name):
+    """Creates a special method that is monitored as a call on the wrapped value."""
     def method(self, *args, **kwargs):
-        if method_name in _PRIMITIVE_CONVERTERS:
-            return getattr(self.get_lovpy_value(), method_name)(*args, **kwargs)
         return LogipyMethod(getattr(self.get_lovpy_value(), method_name), self)(globals(), locals(),
                                                                                 *args, **kwargs)
 
@@ -364,6 +424,8 @@ def _is_callable(obj):
 
 
 for method_name in _SPECIAL_NAMES:
-    setattr(LogipyPrimitive, method_name, _make_primitive_method(method_name))
+    setattr(LogipyPrimitive, method_name,
+            _make_converter_method(method_name) if method_name in _PRIMITIVE_CONVERTERS
+            else _make_wrapped_method(method_name))
 
 # unbound_variable = LogipyPrimitive(None)
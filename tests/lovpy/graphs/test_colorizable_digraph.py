@@ -1,5 +1,7 @@
 import unittest
 
+import networkx
+
 from lovpy.graphs.colorizable_multidigraph import ColorizableMultiDiGraph
 
 
@@ -93,6 +95,19 @@ class TestColorizableDiGraph(unittest.TestCase):
         self.assertTrue(graph.is_edge_colorized(0, 1, 0))
         self.assertTrue(graph.is_edge_colorized(1, 3, 0))
 
+    def test_colorize_edges_and_clear_colorization(self):
+        graph = ColorizableMultiDiGraph()
+        graph.add_edges_from([(0, 1), (0, 1), (1, 2), (1, 3)])
+        graph.colorize_edges({(0, 1, 1), (1, 3, 0)})
+
+        self.assertFalse(graph.is_edge_colorized(0, 1, 0))
+        self.assertTrue(graph.is_edge_colorized(0, 1, 1))
+        self.assertFalse(graph.is_edge_colorized(1, 2, 0))
+        self.assertTrue(graph.is_edge_colorized(1, 3, 0))
+
+        graph.clear_colorization()
+        self.assertFalse(any(graph.is_edge_colorized(*e) for e in graph.edges(keys=True)))
+
     def test_out_colorize_nodes_with_simple_5_node_tree(self):
         graph = ColorizableMultiDiGraph()
         graph.add_edges_from([
@@ -161,3 +176,49 @@ class TestColorizableDiGraph(unittest.TestCase):
         self.assertTrue(graph.is_node_in_colorized(2))
         self.assertTrue(graph.is_node_in_colorized(5))
         self.assertTrue(graph.is_node_in_colorized(6))
+
+    def test_copy_matches_networkx_copy(self):
+        graph = ColorizableMultiDiGraph()
+        graph.add_edges_from([(0, 1, {"t": 1}), (0, 1, {"t": 2}), (1, 2, {"t": 3}), (3, 2)])
+        graph.add_node(4, label="alone")
+        graph.graph["name"] = "sample"
+
+        copy = graph.copy()
+        expected = networkx.MultiDiGraph.copy(graph)
+
+        self.assertIsInstance(copy, ColorizableMultiDiGraph)
+        self.assertEqual(list(copy.nodes(data=True)), list(expected.nodes(data=True)))
+        self.assertEqual(list(copy.edges(keys=True, data=True)),
+                         list(expected.edges(keys=True, data=True)))
+        self.assertEqual(list(copy.in_edges(2, keys=True)), list(expected.in_edges(2, keys=True)))
+        self.assertEqual(copy.graph, expected.graph)
+
+        # Copy should be independent of the original graph.
+        copy[0][1][0]["t"] = 5
+        copy.remove_edge(1, 2)
+        self.assertEqual(graph[0][1][0]["t"], 1)
+        self.assertTrue(graph.has_edge(1, 2))
+        self.assertIs(copy._pred[1][0], copy._succ[0][1])
+
+    def test_add_edges_from_graph_matches_add_edges_from(self):
+        other = ColorizableMultiDiGraph()
+        other.add_edges_from([(0, 1, {"t": 1}), (0, 1, {"t": 2}), (1, 5, {"t": 3})])
+        graph = ColorizableMultiDiGraph()
+        graph.add_edges_from([(0, 1, {"t": 0, "c": True}), (2, 1, {"t": 4})])
+
+        expected = graph.copy()
+        expected.add_edges_from(other.edges(keys=True, data=True))
+        version = graph.structure_version
+        graph.add_edges_from_graph(other)
+
+        self.assertNotEqual(graph.structure_version, version)
+        self.assertEqual(list(graph.nodes(data=True)), list(expected.nodes(data=True)))
+        self.assertEqual(list(graph.edges(keys=True, data=True)),
+                         list(expected.edges(keys=True, data=True)))
+        self.assertEqual(list(graph.in_edges(1, keys=True)),
+                         list(expected.in_edges(1, keys=True)))
+        self.assertIs(graph._pred[5][1], graph._succ[1][5])
+
+        # Added edges should not share their data with other graph.
+        graph[1][5][0]["t"] = 6
+        self.assertEqual(other[1][5][0]["t"], 3)
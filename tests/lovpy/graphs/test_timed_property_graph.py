@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from networkx.algorithms.dag import is_directed_acyclic_graph
@@ -5,6 +6,8 @@ from networkx.algorithms.dag import is_directed_acyclic_graph
 from lovpy.monitor.monitored_predicate import *
 from lovpy.graphs.timed_property_graph import PredicateNode
 from lovpy.graphs.timed_property_graph import PredicateGraph
+from lovpy.graphs.timed_property_graph import (NoPositiveAndNegativePredicatesSimultaneously,
+                                               count_nots_in_path)
 from lovpy.monitor.time_source import get_zero_locked_timesource, TimeSource
 from tests.lovpy.importer.sample_properties import get_counter_sample_properties
 import lovpy.logic.prover as prover
@@ -460,6 +463,60 @@ class TestTimedPropertyGraph(unittest.TestCase):
         self.assertTrue(final.find_equivalent_subgraphs(new_q)[0])
         self.assertTrue(final.find_equivalent_subgraphs(graph)[0])
 
+    def test_get_most_recent_timestamp_follows_graph_changes(self):
+        p = PredicateGraph("P", MonitoredVariable("VAR"))
+        p.set_timestamp(Timestamp(2))
+        self.assertEqual(p.get_most_recent_timestamp().get_absolute_value(), 2)
+
+        q = PredicateGraph("Q", MonitoredVariable("VAR"))
+        q.set_timestamp(Timestamp(5))
+        p.logical_and(q)
+        self.assertEqual(p.get_most_recent_timestamp().get_absolute_value(), 5)
+
+        p.set_timestamp(Timestamp(7))
+        self.assertEqual(p.get_most_recent_timestamp().get_absolute_value(), 7)
+        self.assertTrue(p.is_uniform_timestamped())
+
+        p.get_graph().remove_nodes_from(list(p.get_graph().nodes))
+        self.assertIsNone(p.get_most_recent_timestamp())
+
+    def test_no_positive_and_negative_predicates_simultaneously(self):
+        var = MonitoredVariable("VAR")
+        graph = PredicateGraph("locked", var)
+        graph.set_timestamp(Timestamp(2))
+        graph.add_constant_property(NoPositiveAndNegativePredicatesSimultaneously(graph))
+        graph.add_constant_property(NoPositiveAndNegativePredicatesSimultaneously(graph))
+        self.assertEqual(len(graph.constant_properties), 1)
+
+        unrelated = PredicateGraph("called", var)
+        unrelated.set_timestamp(Timestamp(3))
+        graph.logical_and(unrelated)
+        self.assertEqual(len(graph.get_all_paths()), 2)
+
+        not_locked = PredicateGraph("locked", var)
+        not_locked.logical_not()
+        not_locked.set_timestamp(Timestamp(5))
+        graph.logical_and(not_locked)
+
+        # Only the newer, negated, path to locked predicate should remain.
+        paths = graph.get_all_paths()
+        self.assertEqual(len(paths), 2)
+        locked_paths = [p for p in paths if str(p.path[-1][1]) == "VAR"
+                        and str(p.path[-2][1]) == "locked(VAR)"]
+        self.assertEqual(len(locked_paths), 1)
+        self.assertEqual(count_nots_in_path(locked_paths[0].path), 1)
+
+    def test_pickle_predicate_graph(self):
+        var = MonitoredVariable("VAR")
+        graph = PredicateGraph("locked", var)
+        graph.set_timestamp(Timestamp(2))
+
+        unpickled = pickle.loads(pickle.dumps(graph))
+        self.assertEqual(str(unpickled.get_root_node()), "locked(VAR)")
+        self.assertEqual(unpickled.get_root_node(), graph.get_root_node())
+        self.assertEqual(unpickled.get_leaves(), [var])
+        self.assertTrue(unpickled.contains_property_graph(graph))
+
     @staticmethod
     def _generate_sample_execution_graph_1():
         predicates = TestTimedPropertyGraph._generate_sample_execution_graph_1_predicates()
@@ -135,6 +135,29 @@ class TestProver(unittest.TestCase):
         # visualize_proving_process(intermediate, theorems, properties_to_prove[0],
         #                           display_assumption=False)
 
+    def test_prove_property_without_intermediate_graphs(self):
+        call_acquire = Call("acquire").convert_to_graph()
+        call_acquire.set_timestamp(Timestamp(4))
+
+        call_acquire2 = Call("acquire").convert_to_graph()
+        call_acquire2.set_timestamp(Timestamp(127))
+
+        total_graph = deepcopy(call_acquire)
+        total_graph.logical_and(call_acquire2)
+
+        theorems, properties_to_prove = split_into_theorems_and_properties_to_prove(
+            get_threading_sample_properties())
+
+        proved, theorems_applied, intermediate = prove_property(
+            total_graph, properties_to_prove[0], theorems)
+        proved_alone, theorems_applied_alone, no_intermediate = prove_property(
+            total_graph, properties_to_prove[0], theorems, keep_intermediate_graphs=False)
+
+        self.assertEqual(proved, proved_alone)
+        self.assertEqual(len(theorems_applied), len(theorems_applied_alone))
+        self.assertEqual(len(intermediate), len(theorems_applied) + 1)
+        self.assertEqual(no_intermediate, [])
+
     def test_find_possible_theorem_applications(self):
         call_acquire = Call("acquire").convert_to_graph()
         call_acquire.set_timestamp(Timestamp(4))
@@ -284,6 +284,22 @@ class TestDatasetGenerator(unittest.TestCase):
             verbose=False)
         samples = list(generator)
 
+    def test_generate_samples_in_parallel(self):
+        threading_properties = get_threading_sample_properties()
+        total_samples = 7
+
+        # Batch size intentionally does not divide the number of samples.
+        samples = generate_samples_in_parallel(threading_properties, total_samples, 10,
+                                               random_expansion_probability=0.,
+                                               negative_samples_percentage=0.,
+                                               batch_size=3,
+                                               seed=0)
+
+        self.assertEqual(len(samples), total_samples)
+        for s in samples:
+            self.assertIsInstance(s, DatasetEntity)
+            self.assertIsNotNone(s.goal)
+
     def _test_all_predicates_have_different_timestamps(self, samples):
         for s in samples:
             timestamps = set()
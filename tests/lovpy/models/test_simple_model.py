@@ -0,0 +1,36 @@
+import unittest
+
+from lovpy.models.simple_model import *
+from lovpy.monitor.monitored_predicate import Call, ReturnedBy
+from lovpy.graphs.timestamps import Timestamp
+from lovpy.logic.prover import find_possible_theorem_applications
+from lovpy.logic.properties import split_into_theorems_and_properties_to_prove
+from tests.lovpy.importer.sample_properties import get_threading_sample_properties
+
+
+class TestSimpleModel(unittest.TestCase):
+
+    def test_inference_data_matches_model_input_dim(self):
+        properties = get_threading_sample_properties()
+        theorems, properties_to_prove = split_into_theorems_and_properties_to_prove(properties)
+        predicates_map = PredicatesMap(properties)
+
+        returned_by_allocate_lock = ReturnedBy("allocate_lock").convert_to_graph()
+        returned_by_allocate_lock.set_timestamp(Timestamp(1))
+        call_acquire = Call("acquire").convert_to_graph()
+        call_acquire.set_timestamp(Timestamp(4))
+        current = returned_by_allocate_lock
+        current.logical_and(call_acquire)
+
+        theorem_applications = find_possible_theorem_applications(current, theorems)
+        self.assertTrue(theorem_applications)
+
+        data = convert_theorem_applications_to_data(
+            current, theorem_applications, properties_to_prove[0], predicates_map)
+
+        self.assertEqual(data.shape,
+                         (len(theorem_applications), get_input_dim(predicates_map)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+import lovpy.monitor.monitored_predicate as monitored_predicate
+from lovpy.monitor.monitored_predicate import Call, add_predicate_to_monitor, \
+    is_predicate_type_monitored
+
+
+class TestMonitoredPredicate(unittest.TestCase):
+
+    def setUp(self):
+        self.predicate = Call("__test_monitored_predicate__")
+
+    def tearDown(self):
+        monitored_predicate.predicates_to_monitor.discard(self.predicate)
+        monitored_predicate._monitored_status_cache.clear()
+
+    def test_predicate_type_monitored_after_adding_predicate_to_monitor(self):
+        self.assertFalse(is_predicate_type_monitored(Call, "__test_monitored_predicate__"))
+
+        add_predicate_to_monitor(self.predicate)
+
+        self.assertTrue(is_predicate_type_monitored(Call, "__test_monitored_predicate__"))
@@ -0,0 +1,28 @@
+import pickle
+import unittest
+
+from lovpy.monitor.time_source import TimeSource, get_global_time_source, \
+    get_zero_locked_timesource
+
+
+class TestTimeSource(unittest.TestCase):
+
+    def test_pickling_retains_current_time(self):
+        time_source = TimeSource()
+        time_source.stamp_and_increment()
+        time_source.stamp_and_increment()
+
+        unpickled = pickle.loads(pickle.dumps(time_source))
+
+        self.assertEqual(unpickled.get_current_time(), 2)
+        self.assertEqual(unpickled.stamp_and_increment(), 3)
+
+    def test_pickling_shared_time_sources(self):
+        global_time_source = get_global_time_source()
+        zero_locked_time_source = get_zero_locked_timesource()
+
+        self.assertIs(pickle.loads(pickle.dumps(global_time_source)), global_time_source)
+        self.assertIs(pickle.loads(pickle.dumps(zero_locked_time_source)),
+                      zero_locked_time_source)
+        self.assertEqual(pickle.loads(pickle.dumps(zero_locked_time_source)).get_current_time(),
+                         0)
@@ -1,6 +1,8 @@
 from unittest import TestCase
 
-from lovpy.monitor.wrappers import LogipyPrimitive
+from lovpy.graphs.timed_property_graph import Timestamp
+from lovpy.monitor.monitored_predicate import Call
+from lovpy.monitor.wrappers import LogipyPrimitive, lovpy_call
 
 
 class TestLogipyPrimitive(TestCase):
@@ -13,3 +15,26 @@ class TestLogipyPrimitive(TestCase):
         obj = MyClass()
 
         self.assertEqual(repr(LogipyPrimitive(obj)), repr(obj))
+
+    def test_previous_execution_graph(self) -> None:
+        previous_graph = Call("acquire").convert_to_graph()
+        previous_graph.set_timestamp(Timestamp(1))
+        primitive = LogipyPrimitive(1)
+
+        copied = LogipyPrimitive(primitive, previous_graph)
+        taken = LogipyPrimitive(primitive, previous_graph, take_previous_graph=True)
+
+        self.assertIsNot(copied.get_execution_graph(), previous_graph)
+        self.assertIs(taken.get_execution_graph(), previous_graph)
+        self.assertEqual(copied.get_execution_graph(), previous_graph)
+        self.assertIsNot(copied.get_execution_graph(), primitive.get_execution_graph())
+
+
+class TestLovpyCall(TestCase):
+
+    def test_call_without_primitives(self) -> None:
+        ret = lovpy_call(globals(), locals(), max, 1, 2)
+
+        self.assertIsInstance(ret, LogipyPrimitive)
+        self.assertEqual(ret.get_lovpy_value(), 2)
+        self.assertEqual(ret.get_execution_graph().graph.number_of_edges(), 0)
@@ -0,0 +1,86 @@
+import atexit
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import lovpy.config as config
+import lovpy.monitor.monitored_predicate as monitored_predicate
+from lovpy import exception_handler
+from lovpy.monitor.monitored_predicate import ReturnedBy, add_predicate_to_monitor
+from lovpy.monitor.wrappers import lovpy_call
+
+
+# Module level state of lovpy.config modified by tearup_lovpy() and friends.
+CONFIG_STATE = ["_lovpy_session_name", "_lovpy_temp_dir", "_models_dir", "_scratchdir_created",
+                "_models_dir_created", "_lovpy_initialized", "_runtime_registered"]
+
+
+class TestScratchfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lovpy_temp_dir = Path(self.temp_dir.name) / "lovpy"
+        self.original_state = {name: getattr(config, name) for name in CONFIG_STATE}
+        config.tearup_lovpy(session_name="test", temp_dir=self.lovpy_temp_dir)
+
+    def tearDown(self):
+        config.teardown_lovpy()
+        for name, value in self.original_state.items():
+            setattr(config, name, value)
+        self.temp_dir.cleanup()
+
+    def test_remove_scratchfiles_removes_empty_scratchdir(self):
+        filenames = ["a.png", "b.png", "c.png"]
+        for f in filenames:
+            config.get_scratchfile_path(f).touch()
+        scratchdir = config.get_scratchdir_path()
+
+        config.remove_scratchfiles(filenames + ["missing.png"])
+
+        self.assertFalse(scratchdir.exists())
+        self.assertFalse(self.lovpy_temp_dir.exists())
+
+    def test_remove_scratchfiles_retains_non_empty_scratchdir(self):
+        config.get_scratchfile_path("a.png").touch()
+        config.get_scratchfile_path("b.png").touch()
+
+        config.remove_scratchfiles([config.get_scratchfile_path("a.png")])
+
+        self.assertFalse(config.get_scratchfile_path("a.png").exists())
+        self.assertTrue(config.get_scratchfile_path("b.png").exists())
+
+    def test_teardown_is_idempotent(self):
+        config.teardown_lovpy()
+        config.teardown_lovpy()
+        self.assertFalse(config._lovpy_initialized)
+
+
+class TestRuntimeRegistration(unittest.TestCase):
+
+    def setUp(self):
+        self.original_excepthook = sys.excepthook
+        self.original_registered = config._runtime_registered
+        config._runtime_registered = False
+        self.predicate = ReturnedBy("__test_runtime_registration__")
+        add_predicate_to_monitor(self.predicate)
+
+    def tearDown(self):
+        monitored_predicate.predicates_to_monitor.discard(self.predicate)
+        monitored_predicate._monitored_status_cache.clear()
+        if not self.original_registered:
+            atexit.unregister(config.teardown_lovpy)
+        config._runtime_registered = self.original_registered
+        sys.excepthook = self.original_excepthook
+
+    def test_monitored_call_registers_exception_handler(self):
+        sys.excepthook = sys.__excepthook__
+
+        def __test_runtime_registration__():
+            return 0
+
+        lovpy_call(globals(), locals(), __test_runtime_registration__)
+
+        self.assertTrue(config._runtime_registered)
+        self.assertIn(sys.excepthook, [exception_handler.lovpy_exception_handler,
+                                       exception_handler.lovpy_dev_exception_handler])
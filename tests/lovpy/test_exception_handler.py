@@ -0,0 +1,25 @@
+import inspect
+import traceback
+import unittest
+
+from lovpy.exception_handler import _add_last_proved_info_to_stack_summary
+from lovpy.monitor.wrappers import _get_stack_frames
+
+
+class TestLastProvedInfo(unittest.TestCase):
+
+    def test_last_correct_line_annotated_from_recorded_frames(self):
+        proved_stacktrace = _get_stack_frames()
+        proved_lineno = inspect.currentframe().f_lineno - 1
+        stack_summary = traceback.extract_stack()
+
+        self.assertIsInstance(proved_stacktrace[0], inspect.FrameInfo)
+
+        summary = _add_last_proved_info_to_stack_summary(stack_summary, proved_stacktrace)
+
+        # Frame of this test is annotated with the line where its stack was recorded.
+        test_frame = [f for f in summary if f.filename == __file__][-1]
+        self.assertEqual(
+            test_frame.name,
+            "{} <-- LAST CORRECT LINE, line {}".format(self._testMethodName, proved_lineno)
+        )